@@ -0,0 +1,146 @@
+"""
+Benchmark harness for degrees.
+
+Measures, for each way of loading a dataset directory, the load time, the
+peak resident memory of the process, and the p50/p99 latency of random
+path queries. Each loader runs in its own Python process so their memory
+peaks do not mix, and all of them answer the same queries. Use
+generate.py to make datasets of realistic size.
+
+    python benchmark.py directory [queries] [seed]
+"""
+
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+LOADERS = ["dict", "csr", "snapshot", "landmarks"]
+QUERIES = 200
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--loader":
+        pairs = json.load(sys.stdin)
+        print(json.dumps(run(sys.argv[2], sys.argv[3], pairs)))
+        return
+
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python benchmark.py directory [queries] [seed]")
+    directory = sys.argv[1]
+    queries = int(sys.argv[2]) if len(sys.argv) >= 3 else QUERIES
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else 0
+    pairs = query_pairs(directory, queries, seed)
+
+    # Build the snapshot and landmark files up front, so the loaders
+    # that use them measure a warm start
+    here = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, os.path.join(here, "landmarks.py"),
+                    directory],
+                   check=True, stdout=subprocess.DEVNULL)
+
+    print(f"{'loader':<10} {'load (s)':>10} {'peak RSS (MB)':>14} "
+          f"{'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for loader in LOADERS:
+        output = subprocess.run(
+            [sys.executable, __file__, "--loader", loader, directory],
+            input=json.dumps(pairs), check=True, capture_output=True,
+            text=True
+        ).stdout
+        stats = json.loads(output)
+        print(f"{loader:<10} {stats['load']:>10.3f} {stats['rss']:>14.1f} "
+              f"{stats['p50']:>10.3f} {stats['p99']:>10.3f}")
+
+
+def query_pairs(directory, queries, seed):
+    """
+    Returns queries random (source, target) pairs of IMDb ids of people
+    who starred in a movie, the same for every loader.
+    """
+    with open(os.path.join(directory, "people.csv"), encoding="utf-8") as f:
+        known = {row["id"] for row in csv.DictReader(f)}
+    with open(os.path.join(directory, "stars.csv"), encoding="utf-8") as f:
+        people = sorted({row["person_id"] for row in csv.DictReader(f)}
+                        & known)
+    rng = random.Random(seed)
+    return [(rng.choice(people), rng.choice(people))
+            for _ in range(queries)]
+
+
+def run(loader, directory, pairs):
+    """
+    Loads directory with the named loader and times the path queries in
+    pairs. Returns a dictionary of load time, peak RSS and latency
+    percentiles.
+    """
+    start = time.perf_counter()
+    shortest_path = load(loader, directory)
+    load_time = time.perf_counter() - start
+
+    latencies = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        shortest_path(source, target)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    return {
+        "load": load_time,
+        "rss": peak_rss(),
+        "p50": 1000 * percentile(latencies, 50),
+        "p99": 1000 * percentile(latencies, 99),
+    }
+
+
+def load(loader, directory):
+    """
+    Loads directory with the named loader. Returns a shortest_path function
+    taking IMDb ids.
+    """
+    if loader == "dict":
+        import degrees
+        degrees.load_data(directory)
+        return degrees.shortest_path
+
+    if loader == "csr":
+        from graph import load_graph
+        graph = load_graph(directory)
+    elif loader in ["snapshot", "landmarks"]:
+        from snapshot import load_snapshot
+        graph = load_snapshot(directory)
+        if loader == "landmarks":
+            from landmarks import load_landmarks
+            graph.landmarks = load_landmarks(directory)
+    else:
+        raise ValueError(f"unknown loader {loader}")
+    return graph.shortest_path
+
+
+def peak_rss():
+    """
+    Returns the peak resident memory of this process in megabytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak / 2 ** 20
+    return peak / 2 ** 10
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of sorted values, by nearest rank.
+    """
+    if not values:
+        return 0.0
+    rank = max(0, -(-len(values) * p // 100) - 1)
+    return values[int(rank)]
+
+
+if __name__ == "__main__":
+    main()
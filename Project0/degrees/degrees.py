@@ -2,7 +2,9 @@
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from nameindex import NameIndex
+from snapshot import load_snapshot
+from util import Node, StackFrontier, QueueFrontier, bidirectional_search
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,6 +15,12 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Graph memory-mapped from the snapshot cache when degrees.py is run
+graph = None
+
+# NameIndex over the people in graph, built the first time it is needed
+name_index = None
+
 
 def load_data(directory):
     """
@@ -54,13 +62,15 @@ def load_data(directory):
 
 
 def main():
+    global graph
     if len(sys.argv) > 2:
         sys.exit("Usage: python degrees.py [directory]")
     directory = sys.argv[1] if len(sys.argv) == 2 else "large"
 
-    # Load data from files into memory
+    # Load data from the snapshot cache, which is built from the files
+    # on the first run and rebuilt whenever they change
     print("Loading data...")
-    load_data(directory)
+    graph = load_snapshot(directory)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -70,7 +80,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = graph.shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -79,17 +89,35 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person_names[graph.person_index[path[i][1]]]
+            person2 = graph.person_names[graph.person_index[path[i + 1][1]]]
+            movie = graph.movie_titles[graph.movie_index[path[i + 1][0]]]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=True):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
     If no possible path, returns None.
+
+    By default the search grows from both people at once, which expands
+    far fewer people on distant pairs than a one-sided search, and visits
+    each movie's stars only the first time that movie is reached.
+    """
+    if bidirectional:
+        return bidirectional_search(
+            source, target, movies_for_person, stars_for_movie
+        )
+    return breadth_first_path(source, target)
+
+
+def breadth_first_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using a one-sided
+    breadth-first search from the source.
+    If no possible path, returns None.
     """
 
     start = Node(state=source, parent=None, action=None)
@@ -135,16 +163,35 @@ def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    With the snapshot graph loaded, the choice is made without asking:
+    the person in the most movies among those with the name, or the
+    closest name if nobody has it, and the choice is printed. Otherwise
+    the name is looked up in the data from load_data.
     """
+    if graph is not None:
+        people = people_for_name(name)
+        if len(people) == 0:
+            return None
+        person_id = graph.person_ids[people[0]]
+        found, birth = person_details(person_id)
+        if len(people) > 1:
+            print(f"{len(people)} people named '{name}', "
+                  "using the one in the most movies:")
+        elif found.lower() != name.lower():
+            print(f"No '{name}', using the closest name:")
+        else:
+            return person_id
+        print(f"ID: {person_id}, Name: {found}, Birth: {birth}")
+        return person_id
+
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name, birth = person_details(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -157,6 +204,36 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def people_for_name(name):
+    """
+    Returns the indices of the people in graph with the given name,
+    those in the most movies first. If nobody has the name, returns
+    the closest fuzzy match from the name index instead, if any.
+    """
+    global name_index
+    people = graph.names.get(name.lower(), [])
+    if people:
+        return sorted(people,
+                      key=lambda person: -len(graph.movies_for_person(person)))
+
+    # Exact names are answered by the graph itself, so the index is only
+    # built, at a cost that grows with the dataset, when one is misspelt
+    if name_index is None:
+        name_index = NameIndex.from_graph(graph)
+    return name_index.fuzzy(name, limit=1)
+
+
+def person_details(person_id):
+    """
+    Returns the name and birth year of the person with the given IMDB id.
+    """
+    if graph is not None:
+        person = graph.person_index[person_id]
+        return graph.person_names[person], graph.person_births[person]
+    person = people[person_id]
+    return person["name"], person["birth"]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
@@ -170,5 +247,19 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def movies_for_person(person_id):
+    """
+    Returns the movie_ids a given person starred in.
+    """
+    return people[person_id]["movies"]
+
+
+def stars_for_movie(movie_id):
+    """
+    Returns the person_ids of people who starred in a given movie.
+    """
+    return movies[movie_id]["stars"]
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
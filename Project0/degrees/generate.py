@@ -0,0 +1,115 @@
+"""
+Synthetic dataset generator for degrees.
+
+Writes people.csv, movies.csv and stars.csv in the same format as the
+small and large directories, at any size. Cast sizes follow a power law,
+so most movies have a few stars and a few have very large casts, and
+stars are picked with power-law popularity, so a handful of people
+appear in many movies while most appear in one or two.
+
+    python generate.py directory rows [seed]
+
+rows is the number of rows written to stars.csv.
+"""
+
+import csv
+import itertools
+import os
+import random
+import sys
+
+# Shape of the power laws for cast size and star popularity
+CAST_EXPONENT = 1.6
+POPULARITY_EXPONENT = 0.75
+MAX_CAST = 500
+
+# Ratios of people and movies to star rows, close to the IMDb data
+PEOPLE_PER_ROW = 0.3
+MOVIES_PER_ROW = 0.5
+
+FIRST_NAMES = [
+    "Alex", "Anna", "Ben", "Carla", "Chris", "Dana", "Eli", "Emma", "Frank",
+    "Grace", "Hana", "Ivan", "Jack", "Julia", "Kim", "Leo", "Maria", "Nina",
+    "Omar", "Paul", "Rosa", "Sam", "Tara", "Tom", "Vera", "Will", "Yuki",
+]
+SYLLABLES = [
+    "an", "ber", "car", "del", "son", "ton", "ley", "mar", "ner", "ros",
+    "sen", "tis", "van", "win", "ko", "li", "ma", "no", "ra", "zu",
+]
+
+
+def main():
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python generate.py directory rows [seed]")
+    directory = sys.argv[1]
+    rows = int(sys.argv[2])
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else 0
+
+    generate(directory, rows, random.Random(seed))
+    print(f"Wrote {rows} stars to {directory}.")
+
+
+def generate(directory, rows, rng):
+    """
+    Writes a synthetic dataset with about rows star rows to directory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    people = max(2, int(rows * PEOPLE_PER_ROW))
+    movies = max(1, int(rows * MOVIES_PER_ROW))
+
+    # Popularity of the i-th person falls off as a power of i
+    cumulative = list(itertools.accumulate(
+        1 / (i + 1) ** POPULARITY_EXPONENT for i in range(people)
+    ))
+
+    with open(f"{directory}/people.csv", "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(people):
+            birth = rng.randint(1900, 2010) if rng.random() < 0.8 else ""
+            writer.writerow([person + 1, name(rng), birth])
+
+    with open(f"{directory}/movies.csv", "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(movies):
+            writer.writerow([movie + 1, title(rng), rng.randint(1920, 2020)])
+
+    with open(f"{directory}/stars.csv", "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        written = 0
+        for movie in itertools.cycle(range(1, movies + 1)):
+            if written >= rows:
+                break
+            size = min(int(rng.paretovariate(CAST_EXPONENT)), MAX_CAST,
+                       rows - written)
+            cast = set(rng.choices(range(people), cum_weights=cumulative,
+                                   k=size))
+            for person in cast:
+                writer.writerow([person + 1, movie])
+            written += len(cast)
+
+
+def name(rng):
+    """
+    Returns a random person name; common names repeat, as in real data.
+    """
+    surname = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 3)))
+    return f"{rng.choice(FIRST_NAMES)} {surname.capitalize()}"
+
+
+def title(rng):
+    """
+    Returns a random movie title.
+    """
+    words = ["".join(rng.choices(SYLLABLES, k=rng.randint(1, 3))).capitalize()
+             for _ in range(rng.randint(1, 4))]
+    return " ".join(words)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+import csv
+import math
+from array import array
+
+from util import bidirectional_search
+
+
+class Graph():
+    """
+    Compact store for the person-movie graph.
+
+    People and movies are interned to dense integer indices, and the
+    bipartite star relation is kept in CSR form: the movies of person p are
+    person_movies[person_offsets[p]:person_offsets[p + 1]], and the stars
+    of movie m are movie_stars[movie_offsets[m]:movie_offsets[m + 1]].
+    """
+
+    def __init__(self):
+        # Per-person columns, indexed by person index
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+
+        # Per-movie columns, indexed by movie index
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+
+        # Maps IMDb ids to indices
+        self.person_index = {}
+        self.movie_index = {}
+
+        # Maps lowercase names to a list of person indices
+        self.names = {}
+
+        # CSR adjacency in both directions
+        self.person_offsets = array("q", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("q", [0])
+        self.movie_stars = array("i")
+
+        # Optional LandmarkIndex used to prune searches
+        self.landmarks = None
+
+    def movies_for_person(self, person):
+        """
+        Returns the movie indices a person starred in.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_for_movie(self, movie):
+        """
+        Returns the person indices who starred in a movie.
+        """
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors_for_person(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person.
+        """
+        for movie in self.movies_for_person(person):
+            for star in self.stars_for_movie(movie):
+                yield movie, star
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the IMDb ids of every person with the given name.
+        """
+        return [self.person_ids[person]
+                for person in self.names.get(name.lower(), [])]
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, given as IMDb ids.
+        If no possible path, returns None.
+        """
+        path = self.search(self.person_index[source], self.person_index[target])
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+    def search(self, source, target, limit=None):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source to the target, given as person indices.
+        If no possible path, returns None.
+
+        With landmarks loaded, their distance bounds answer disconnected
+        pairs without searching and cap how deep the search goes. If limit
+        is given, paths longer than limit are not searched for, and None
+        is returned instead.
+        """
+        if limit is None:
+            limit = math.inf
+        if self.landmarks is not None:
+            lower, upper = self.landmarks.bounds(source, target)
+            if lower == math.inf or lower > min(upper, limit):
+                return None
+            limit = min(upper, limit)
+        return bidirectional_search(
+            source, target, self.movies_for_person, self.stars_for_movie,
+            None if limit == math.inf else limit
+        )
+
+    def distances_from(self, source):
+        """
+        Runs one breadth-first search from the person with index source
+        over the whole graph. Returns (distances, parents, movies) arrays
+        indexed by person: the number of degrees from source (-1 if not
+        connected), and the person and movie each person was reached
+        through (-1 for the source and for unconnected people).
+        """
+        size = len(self.person_ids)
+        distances = array("i", [-1]) * size
+        parents = array("i", [-1]) * size
+        movies = array("i", [-1]) * size
+        expanded = bytearray(len(self.movie_ids))
+
+        distances[source] = 0
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for person in frontier:
+                for movie in self.movies_for_person(person):
+
+                    # Every star of a movie is reached the first time
+                    # it is expanded, so it never needs expanding again
+                    if expanded[movie]:
+                        continue
+                    expanded[movie] = 1
+                    for star in self.stars_for_movie(movie):
+                        if distances[star] < 0:
+                            distances[star] = depth
+                            parents[star] = person
+                            movies[star] = movie
+                            next_frontier.append(star)
+            frontier = next_frontier
+        return distances, parents, movies
+
+    def path_from_parents(self, search, target):
+        """
+        Returns the (movie_id, person_id) pairs leading to the person with
+        index target, given the (distances, parents, movies) arrays from
+        distances_from. Returns None if target was not reached.
+        """
+        distances, parents, movies = search
+        if distances[target] < 0:
+            return None
+        path = []
+        person = target
+        while parents[person] >= 0:
+            path.append((self.movie_ids[movies[person]],
+                         self.person_ids[person]))
+            person = parents[person]
+        path.reverse()
+        return path
+
+    def histograms(self, sources, batch=64):
+        """
+        Returns, for each person index in sources, a list whose d-th item
+        is the number of people exactly d degrees away from them.
+
+        Sources are searched together in batches: each person and movie
+        carries a bit mask of the sources that have reached it, so one
+        sweep over the graph advances every search in the batch. Counts
+        are accumulated in bit-sliced counters, one big integer per bit
+        of the count, so they also cost a handful of operations per
+        frontier person rather than one per source.
+        """
+        results = []
+        for start in range(0, len(sources), batch):
+            results.extend(self.batch_histograms(sources[start:start + batch]))
+        return results
+
+    def batch_histograms(self, sources):
+        """
+        Returns the histograms for a batch of sources searched together.
+        """
+        reached = [0] * len(self.person_ids)
+        expanded = [0] * len(self.movie_ids)
+        frontier = {}
+        for i, source in enumerate(sources):
+            reached[source] |= 1 << i
+            frontier[source] = frontier.get(source, 0) | (1 << i)
+
+        histograms = [[1] for _ in sources]
+        while frontier:
+
+            # Gather, per movie, the searches that reach it for the first time
+            movie_masks = {}
+            for person, mask in frontier.items():
+                for movie in self.movies_for_person(person):
+                    new = mask & ~expanded[movie]
+                    if new:
+                        movie_masks[movie] = movie_masks.get(movie, 0) | new
+            for movie, mask in movie_masks.items():
+                expanded[movie] |= mask
+
+            # Advance every search in the batch by one degree at once
+            next_frontier = {}
+            counters = []
+            for movie, mask in movie_masks.items():
+                for star in self.stars_for_movie(movie):
+                    new = mask & ~reached[star]
+                    if new:
+                        reached[star] |= new
+                        next_frontier[star] = next_frontier.get(star, 0) | new
+            for mask in next_frontier.values():
+                add_to_counters(counters, mask)
+
+            for i, histogram in enumerate(histograms):
+                count = sum(((counter >> i) & 1) << bit
+                            for bit, counter in enumerate(counters))
+                if count:
+                    histogram.append(count)
+            frontier = next_frontier
+        return histograms
+
+
+def add_to_counters(counters, mask):
+    """
+    Adds one to every bit-sliced counter selected by mask, where
+    counters[b] holds bit b of all the counters.
+    """
+    carry = mask
+    for bit, counter in enumerate(counters):
+        counters[bit] = counter ^ carry
+        carry &= counter
+        if not carry:
+            return
+    counters.append(carry)
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files into a compact Graph.
+    """
+    graph = Graph()
+
+    # Load people
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person = len(graph.person_ids)
+            graph.person_index[row["id"]] = person
+            graph.person_ids.append(row["id"])
+            graph.person_names.append(row["name"])
+            graph.person_births.append(row["birth"])
+            graph.names.setdefault(row["name"].lower(), []).append(person)
+
+    # Load movies
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            graph.movie_index[row["id"]] = len(graph.movie_ids)
+            graph.movie_ids.append(row["id"])
+            graph.movie_titles.append(row["title"])
+            graph.movie_years.append(row["year"])
+
+    # Load stars as parallel edge lists, skipping unknown ids
+    edge_people = array("i")
+    edge_movies = array("i")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person = graph.person_index.get(row["person_id"])
+            movie = graph.movie_index.get(row["movie_id"])
+            if person is None or movie is None:
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+    person_offsets, person_movies = build_csr(
+        len(graph.person_ids), edge_people, edge_movies
+    )
+    movie_offsets, movie_stars = build_csr(
+        len(graph.movie_ids), edge_movies, edge_people
+    )
+
+    # Slices of a memoryview share its buffer, so expanding a person
+    # or movie does not copy their neighbors the way array slices do
+    graph.person_offsets = memoryview(person_offsets)
+    graph.person_movies = memoryview(person_movies)
+    graph.movie_offsets = memoryview(movie_offsets)
+    graph.movie_stars = memoryview(movie_stars)
+    return graph
+
+
+def build_csr(size, sources, targets):
+    """
+    Returns (offsets, indices) arrays grouping targets by source,
+    using a counting sort over the edge lists. Repeated edges are
+    kept only once.
+    """
+    offsets = array("q", bytes(8 * (size + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    indices = array("i", bytes(4 * len(targets)))
+    position = array("q", offsets[:-1])
+    for source, target in zip(sources, targets):
+        indices[position[source]] = target
+        position[source] += 1
+
+    # stars.csv may list the same star of a movie more than once
+    end = 0
+    for i in range(size):
+        unique = array("i", dict.fromkeys(indices[offsets[i]:offsets[i + 1]]))
+        indices[end:end + len(unique)] = unique
+        offsets[i] = end
+        end += len(unique)
+    offsets[size] = end
+    del indices[end:]
+    return offsets, indices
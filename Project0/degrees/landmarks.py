@@ -0,0 +1,193 @@
+"""
+Landmark distance oracle for degrees.
+
+A landmark index stores the distance from a handful of well-connected
+people to everyone else, one byte per person per landmark. By the triangle
+inequality, for any landmark L the distance between two people a and b is
+at least |d(L, a) - d(L, b)| and at most d(L, a) + d(L, b), so the index
+bounds any distance with a few array lookups. Graph.search uses those
+bounds to answer disconnected pairs at once and to cap its search depth.
+
+The index is built offline and stored next to the data:
+
+    python landmarks.py [directory] [count]
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from snapshot import fingerprint, load_snapshot
+
+MAGIC = b"DEGLMK01"
+FILENAME = "degrees.landmarks"
+COUNT = 16
+
+# Distance byte for people a landmark cannot reach
+UNREACHABLE = 255
+
+# Distance byte for people SATURATED or more degrees from a landmark
+SATURATED = 254
+
+
+class LandmarkIndex():
+    """
+    Distances from each of a few landmark people to every person.
+    """
+
+    def __init__(self, landmarks, rows):
+        # Person indices of the landmarks
+        self.landmarks = landmarks
+
+        # rows[i][p] is the distance from landmarks[i] to person p
+        self.rows = rows
+
+    def lower_bound(self, a, b):
+        """
+        Returns a lower bound on the degrees between people a and b,
+        or math.inf if they are known not to be connected.
+        """
+        lower = 0
+        for row in self.rows:
+            da, db = row[a], row[b]
+            if da == UNREACHABLE or db == UNREACHABLE:
+                if da != db:
+                    return math.inf
+                continue
+            if da - db > lower:
+                lower = da - db
+            elif db - da > lower:
+                lower = db - da
+        return lower
+
+    def bounds(self, a, b):
+        """
+        Returns (lower, upper) bounds on the degrees between people a and b.
+        Either may be math.inf.
+        """
+        # Saturated distances are only known to be at least SATURATED,
+        # which still bounds them from below but not from above
+        upper = math.inf
+        for row in self.rows:
+            da, db = row[a], row[b]
+            if da < SATURATED and db < SATURATED:
+                upper = min(upper, da + db)
+        return self.lower_bound(a, b), upper
+
+    def within(self, graph, a, b, degrees):
+        """
+        Returns True if people a and b are at most degrees apart. Answers
+        from the bounds alone when they decide it, and otherwise runs
+        a search restricted to paths no longer than degrees.
+        """
+        lower, upper = self.bounds(a, b)
+        if lower > degrees:
+            return False
+        if upper <= degrees:
+            return True
+        path = graph.search(a, b, degrees)
+        return path is not None and len(path) <= degrees
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python landmarks.py [directory] [count]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else COUNT
+
+    print("Loading data...")
+    graph = load_snapshot(directory)
+    print("Data loaded.")
+
+    print(f"Building {count} landmarks...")
+    index = build_landmarks(graph, count)
+    write_landmarks(index, os.path.join(directory, FILENAME),
+                    fingerprint(directory))
+    for person in index.landmarks:
+        print(f"  {graph.person_names[person]} ({graph.person_ids[person]})")
+
+
+def build_landmarks(graph, count=COUNT):
+    """
+    Returns a LandmarkIndex for graph using the count people
+    who starred in the most movies as landmarks.
+    """
+    offsets = graph.person_offsets
+    people = sorted(range(len(graph.person_ids)),
+                    key=lambda p: offsets[p + 1] - offsets[p], reverse=True)
+    landmarks = array("i", people[:count])
+
+    rows = []
+    for landmark in landmarks:
+        distances, _, _ = graph.distances_from(landmark)
+        rows.append(bytes(
+            UNREACHABLE if d < 0 else min(d, SATURATED)
+            for d in distances
+        ))
+    return LandmarkIndex(landmarks, rows)
+
+
+def load_landmarks(directory):
+    """
+    Returns the LandmarkIndex stored for directory, memory-mapped,
+    or None if there is none or it is stale.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    buffer = memoryview(data)
+    try:
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("not a landmark index")
+        start = len(MAGIC) + 8
+        (length,) = struct.unpack("<Q", buffer[len(MAGIC):start])
+        header = json.loads(str(buffer[start:start + length], "utf-8"))
+        if header["sources"] != fingerprint(directory):
+            raise ValueError("landmark index is stale")
+    except (ValueError, KeyError, struct.error):
+        buffer.release()
+        data.close()
+        return None
+
+    size = header["people"]
+    start += length
+    rows = [buffer[start + i * size:start + (i + 1) * size]
+            for i in range(len(header["landmarks"]))]
+    return LandmarkIndex(array("i", header["landmarks"]), rows)
+
+
+def write_landmarks(index, path, sources):
+    """
+    Writes index to path, tagged with the given source fingerprint.
+    """
+    size = len(index.rows[0]) if index.rows else 0
+    header = json.dumps({
+        "sources": sources,
+        "landmarks": list(index.landmarks),
+        "people": size,
+    }).encode("utf-8")
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for row in index.rows:
+                f.write(row)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+if __name__ == "__main__":
+    main()
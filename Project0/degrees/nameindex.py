@@ -0,0 +1,242 @@
+"""
+Name index for degrees with prefix and fuzzy lookup.
+
+Names are kept lowercased in one sorted list, so every name sharing a
+prefix occupies a contiguous range of positions. A max segment tree over
+the rank weight of each position (for people, their number of movies)
+returns the best few names in a range without scanning all of it, which
+keeps autocomplete fast even for one-letter prefixes. Fuzzy lookup walks
+the sorted names as an implicit trie, sharing edit-distance rows between
+names with a common prefix and skipping whole prefixes that are already
+too far from the query.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+
+# Sorts after any character that can appear in a name
+LAST_CHARACTER = chr(0x10FFFF)
+
+
+class NameIndex():
+    """
+    Ranked name lookup over items numbered 0 to n - 1. Lookups return
+    item numbers, best first: higher weight, then alphabetical order.
+    """
+
+    def __init__(self, names, weights, order=None):
+        """
+        Builds the index for items whose display names and rank weights
+        are given by the names and weights sequences. order may give the
+        item numbers already sorted by lowercase name.
+        """
+        if order is None:
+            order = sorted(range(len(names)), key=lambda i: names[i].lower())
+        self.items = array("i", order)
+        self.keys = [names[item].lower() for item in self.items]
+        self.weights = array("q", [weights[item] for item in self.items])
+
+        # Max segment tree over positions, padded to a power of two;
+        # each node holds the position of the heaviest name below it
+        size = 1
+        while size < len(self.keys):
+            size *= 2
+        self.size = size
+        self.tree = array("i", [-1]) * (2 * size)
+        self.tree[size:size + len(self.keys)] = array(
+            "i", range(len(self.keys))
+        )
+        for node in range(size - 1, 0, -1):
+            self.tree[node] = self.heavier(
+                self.tree[2 * node], self.tree[2 * node + 1]
+            )
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Returns an index over the people of graph, ranked by number
+        of movies. Reuses the name order of a snapshot if there is one.
+        """
+        offsets = graph.person_offsets
+        weights = [offsets[p + 1] - offsets[p]
+                   for p in range(len(graph.person_ids))]
+        return cls(graph.person_names, weights,
+                   getattr(graph.names, "order", None))
+
+    def heavier(self, a, b):
+        """
+        Returns whichever of two positions ranks first, ignoring -1.
+        """
+        if a < 0:
+            return b
+        if b < 0:
+            return a
+        if self.weights[b] > self.weights[a]:
+            return b
+        return a
+
+    def exact(self, name):
+        """
+        Returns every item with exactly this name, ignoring case.
+        """
+        key = name.lower()
+        lo = bisect_left(self.keys, key)
+        hi = lo
+        while hi < len(self.keys) and self.keys[hi] == key:
+            hi += 1
+        return self.best(lo, hi, hi - lo)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to limit items whose names start with prefix.
+        """
+        key = prefix.lower()
+        lo = bisect_left(self.keys, key)
+        hi = bisect_left(self.keys, key + LAST_CHARACTER, lo)
+        return self.best(lo, hi, limit)
+
+    def best(self, lo, hi, limit):
+        """
+        Returns the limit highest ranked items at positions lo to hi - 1.
+        """
+        return [self.items[position]
+                for position in self.best_positions(lo, hi, limit)]
+
+    def best_positions(self, lo, hi, limit):
+        """
+        Returns the positions of the limit highest ranked names
+        at positions lo to hi - 1.
+        """
+        # Start from the canonical tree nodes covering the range
+        heap = []
+        left, right = lo + self.size, hi + self.size
+        while left < right:
+            if left & 1:
+                self.push(heap, left)
+                left += 1
+            if right & 1:
+                right -= 1
+                self.push(heap, right)
+            left //= 2
+            right //= 2
+
+        # Split the best node until limit leaves have come off the heap
+        results = []
+        while heap and len(results) < limit:
+            _, _, node = heapq.heappop(heap)
+            if node >= self.size:
+                results.append(node - self.size)
+            else:
+                self.push(heap, 2 * node)
+                self.push(heap, 2 * node + 1)
+        return results
+
+    def push(self, heap, node):
+        position = self.tree[node]
+        if position >= 0:
+            heapq.heappush(heap, (-self.weights[position], position, node))
+
+    def fuzzy(self, name, max_distance=2, limit=10, max_steps=5000,
+              prefix=False):
+        """
+        Returns up to limit items whose names are within max_distance
+        edits of name, closest first. With prefix set, it is enough for
+        a name to start with something within max_distance edits of
+        name, which suits partly typed names. Names starting with the same
+        character as name are tried first, which keeps the walk to a small
+        part of the index; only if none of them match, for example after
+        a typo in the first character, is the whole index walked. Each
+        walk gives up after max_steps name characters, returning the
+        matches found by then.
+        """
+        query = name.lower()
+        if not query:
+            return []
+        start = bisect_left(self.keys, query[0])
+        end = bisect_left(self.keys, query[0] + LAST_CHARACTER, start)
+        matches = self.walk(query, start, end, max_distance, limit,
+                            max_steps, prefix)
+        if not matches:
+            matches = self.walk(query, 0, len(self.keys), max_distance,
+                                limit, max_steps, prefix)
+        matches.sort()
+        return [self.items[position] for _, _, position in matches[:limit]]
+
+    def walk(self, query, start, end, max_distance, limit, max_steps,
+             prefix):
+        """
+        Returns (distance, -weight, position) for the names at positions
+        start to end - 1 within max_distance edits of query, or with
+        prefix set, starting within max_distance edits of it, stopping
+        after max_steps name characters. Of the names sharing a matching
+        prefix, only the limit best ranked are returned.
+        """
+        matches = []
+
+        # rows[d] holds the edit distances between the first d characters
+        # of the current name and each prefix of the query, and closest[d]
+        # the distance between the query and the closest of those starts
+        rows = [list(range(len(query) + 1))]
+        closest = [len(query)]
+        previous = ""
+        steps = 0
+        i = start
+        while i < end and steps < max_steps:
+            key = self.keys[i]
+            shared = 0
+            limit_shared = min(len(previous), len(key), len(rows) - 1)
+            while shared < limit_shared and previous[shared] == key[shared]:
+                shared += 1
+            del rows[shared + 1:]
+            del closest[shared + 1:]
+            previous = key
+
+            skipped = False
+            for depth in range(shared, len(key)):
+                row = next_row(rows[-1], key[depth], query)
+                rows.append(row)
+                closest.append(min(closest[-1], row[-1]))
+                steps += 1
+                if prefix and closest[-1] <= min(max_distance, min(row)):
+
+                    # Every name starting this way matches, and no longer
+                    # start can be any closer to the query
+                    hi = bisect_left(self.keys, key[:depth + 1] + LAST_CHARACTER,
+                                     i + 1, end)
+                    for position in self.best_positions(i, hi, limit):
+                        matches.append((closest[-1], -self.weights[position],
+                                        position))
+                    i = hi
+                    skipped = True
+                    break
+                if min(row) > max_distance:
+
+                    # No name starting this way can come close enough
+                    i = bisect_left(self.keys, key[:depth + 1] + LAST_CHARACTER,
+                                    i + 1, end)
+                    skipped = True
+                    break
+            if skipped:
+                continue
+
+            distance = closest[-1] if prefix else rows[-1][-1]
+            if distance <= max_distance:
+                matches.append((distance, -self.weights[i], i))
+            i += 1
+        return matches
+
+
+def next_row(row, character, query):
+    """
+    Returns the edit distance row for one more name character,
+    given the row for the name so far.
+    """
+    result = [row[0] + 1]
+    for j in range(1, len(query) + 1):
+        result.append(min(
+            result[j - 1] + 1,
+            row[j] + 1,
+            row[j - 1] + (query[j - 1] != character)
+        ))
+    return result
@@ -0,0 +1,250 @@
+"""
+Long-running query mode for degrees.
+
+Loads the dataset once and answers a stream of path queries, one JSON
+object per line, read from stdin or from clients of a local Unix socket:
+
+    {"source": "Emma Watson", "target": "Jennifer Lawrence"}
+
+People may also be given by IMDb id with "source_id" and "target_id", and
+any "id" field is echoed back so clients can match answers to queries.
+Each answer is a single JSON line holding either the path or an "error".
+
+Name autocomplete queries return ranked candidates instead of a path.
+With "fuzzy" set, they fall back to names starting within two edits of
+the given text when no name starts with the text itself:
+
+    {"complete": "emma wat", "limit": 5, "fuzzy": true}
+
+Fuzzy matches are looked for among names sharing the first letter of the
+text, and only if there are none, in the whole index, so a typo in the
+first letter makes for a slower lookup.
+
+With --workers, queries are fanned out across a process pool. Workers are
+forked after the graph and its name index are loaded, so they share them
+read-only instead of building their own copies.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socketserver
+import sys
+
+from landmarks import load_landmarks
+from nameindex import NameIndex
+from snapshot import load_snapshot
+
+# Graph shared by the server and, through fork, by its workers
+graph = None
+
+# Name index over the graph, shared the same way
+name_index = None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer degrees path queries as JSON lines."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--socket", help="serve on this Unix socket path "
+                                         "instead of stdin/stdout")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="answer queries in a pool of this many processes")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    initialize(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    pool = None
+    if args.workers > 0:
+        pool = multiprocessing.Pool(
+            args.workers, initializer=initialize, initargs=(args.directory,)
+        )
+
+    try:
+        if args.socket:
+            serve_socket(args.socket, pool)
+        else:
+            serve_stream(sys.stdin, sys.stdout, pool)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def initialize(directory):
+    """
+    Loads the graph for directory, unless this process already holds it,
+    along with its landmark index if one has been built, and builds its
+    name index.
+    """
+    global graph, name_index
+    if graph is None:
+        graph = load_snapshot(directory)
+        graph.landmarks = load_landmarks(directory)
+        name_index = NameIndex.from_graph(graph)
+
+
+def serve_stream(lines, output, pool=None):
+    """
+    Answers each query line from lines, writing answers to output in order.
+    """
+    queries = (line for line in lines if line.strip())
+    if pool is None:
+        answers = map(answer, queries)
+    else:
+        answers = pool.imap(answer, queries)
+    for reply in answers:
+        output.write(reply + "\n")
+        output.flush()
+
+
+def serve_socket(path, pool=None):
+    """
+    Answers queries from clients of a Unix socket at path, one thread
+    per connection, until interrupted.
+    """
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    line = line.decode("utf-8")
+                except UnicodeDecodeError as e:
+                    reply = json.dumps({"error": str(e)})
+                    self.wfile.write(reply.encode("utf-8") + b"\n")
+                    self.wfile.flush()
+                    continue
+                if not line.strip():
+                    continue
+                if pool is None:
+                    reply = answer(line)
+                else:
+                    reply = pool.apply(answer, (line,))
+                self.wfile.write(reply.encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    if os.path.exists(path):
+        os.remove(path)
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        server.daemon_threads = True
+        print(f"Listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+
+
+def answer(line):
+    """
+    Returns the JSON answer line for a single JSON query line. Any error
+    in answering becomes an "error" answer, so one bad query cannot stop
+    the server.
+    """
+    query = None
+    try:
+        query = json.loads(line)
+        if not isinstance(query, dict):
+            raise ValueError("query must be a JSON object")
+        if "complete" in query:
+            reply = complete(query)
+        else:
+            reply = solve(query)
+    except ValueError as e:
+        reply = {"error": str(e)}
+    except Exception as e:
+        reply = {"error": f"{type(e).__name__}: {e}"}
+    if isinstance(query, dict) and "id" in query:
+        reply["id"] = query["id"]
+    return json.dumps(reply)
+
+
+def solve(query):
+    """
+    Returns the answer to a parsed query as a dictionary.
+    Raises ValueError if a person cannot be resolved.
+    """
+    source = resolve(query, "source")
+    target = resolve(query, "target")
+
+    path = graph.shortest_path(source, target)
+    reply = {"source": source, "target": target}
+    if path is None:
+        reply["degrees"] = None
+        reply["path"] = None
+        return reply
+
+    reply["degrees"] = len(path)
+    reply["path"] = [
+        {
+            "movie_id": movie_id,
+            "movie": graph.movie_titles[graph.movie_index[movie_id]],
+            "person_id": person_id,
+            "person": graph.person_names[graph.person_index[person_id]],
+        }
+        for movie_id, person_id in path
+    ]
+    return reply
+
+
+def complete(query):
+    """
+    Returns the ranked candidates for an autocomplete query.
+    """
+    text = query["complete"]
+    limit = query.get("limit", 10)
+    if not isinstance(text, str):
+        raise ValueError("complete: text must be a string")
+    if not isinstance(limit, int) or limit < 1:
+        raise ValueError("limit: must be a positive integer")
+
+    people = name_index.prefix(text, limit)
+    if not people and query.get("fuzzy"):
+        people = name_index.fuzzy(text, limit=limit, prefix=True)
+    return {"candidates": [describe(person) for person in people]}
+
+
+def describe(person):
+    """
+    Returns a dictionary describing the person with index person.
+    """
+    return {
+        "person_id": graph.person_ids[person],
+        "name": graph.person_names[person],
+        "birth": graph.person_births[person],
+        "movies": len(graph.movies_for_person(person)),
+    }
+
+
+def resolve(query, role):
+    """
+    Returns the IMDb id of the person named by the role field of a query,
+    or given directly by its role_id field.
+    Raises ValueError if there is no such person or the name is ambiguous.
+    """
+    if f"{role}_id" in query:
+        person_id = str(query[f"{role}_id"])
+        if graph.person_index.get(person_id) is None:
+            raise ValueError(f"{role}: no person with id {person_id}")
+        return person_id
+
+    name = query.get(role)
+    if not isinstance(name, str):
+        raise ValueError(f"{role}: missing name")
+    people = name_index.exact(name)
+    if len(people) == 0:
+        raise ValueError(f"{role}: person not found")
+    if len(people) > 1:
+        person_ids = [graph.person_ids[person] for person in people]
+        raise ValueError(f"{role}: ambiguous name, use {role}_id with one "
+                         f"of {', '.join(person_ids)}")
+    return graph.person_ids[people[0]]
+
+
+if __name__ == "__main__":
+    main()
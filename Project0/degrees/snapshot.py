@@ -0,0 +1,266 @@
+"""
+Binary snapshot cache for the degrees dataset.
+
+The first load of a directory parses the CSV files into a Graph and writes
+it to a single snapshot file next to them. Later loads memory-map that file
+instead, so start-up cost no longer depends on the size of the dataset.
+A snapshot is rebuilt whenever the size or modification time of any of the
+CSV files changes.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from graph import Graph, load_graph
+
+MAGIC = b"DEGSNAP1"
+FILENAME = "degrees.snapshot"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Names of the string columns stored in a snapshot
+PERSON_COLUMNS = ["person_ids", "person_names", "person_births"]
+MOVIE_COLUMNS = ["movie_ids", "movie_titles", "movie_years"]
+
+
+class StringColumn():
+    """
+    Read-only sequence of strings stored as one UTF-8 blob plus offsets.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("column index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class SortedIndex():
+    """
+    Read-only lookup from column values to indices, found by binary search
+    over an order array that lists indices sorted by value.
+
+    Supports the get and [] subset of the dict API. When unique is False,
+    lookups return the list of every matching index, and when fold is True
+    keys are compared in lowercase.
+    """
+
+    def __init__(self, column, order, unique=True, fold=False):
+        self.column = column
+        self.order = order
+        self.unique = unique
+        self.fold = fold
+
+    def key(self, position):
+        value = self.column[self.order[position]]
+        return value.lower() if self.fold else value
+
+    def span(self, key):
+        """
+        Returns the (lo, hi) range of positions in order holding key.
+        """
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        end = lo
+        while end < len(self.order) and self.key(end) == key:
+            end += 1
+        return lo, end
+
+    def get(self, key, default=None):
+        lo, hi = self.span(key)
+        if lo == hi:
+            return default
+        if self.unique:
+            return self.order[lo]
+        return list(self.order[lo:hi])
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        lo, hi = self.span(key)
+        return lo < hi
+
+
+def fingerprint(directory):
+    """
+    Returns the size and modification time of each source CSV file.
+    """
+    result = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        result[name] = [stat.st_size, stat.st_mtime_ns]
+    return result
+
+
+def load_snapshot(directory):
+    """
+    Returns the Graph for directory, memory-mapped from its snapshot.
+    The snapshot is (re)built from the CSV files first if it is missing
+    or stale; if it cannot be written, the freshly parsed Graph is
+    returned instead.
+    """
+    path = os.path.join(directory, FILENAME)
+    current = fingerprint(directory)
+    graph = read_snapshot(path, current)
+    if graph is not None:
+        return graph
+
+    graph = load_graph(directory)
+    try:
+        write_snapshot(graph, path, current)
+    except OSError:
+        return graph
+    return read_snapshot(path, current) or graph
+
+
+def read_snapshot(path, expected=None):
+    """
+    Memory-maps the snapshot at path and returns it as a Graph.
+    Returns None if the file is missing, malformed, or was built
+    from CSV files other than those described by expected.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    buffer = memoryview(data)
+    try:
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("not a degrees snapshot")
+        start = len(MAGIC) + 8
+        (length,) = struct.unpack("<Q", buffer[len(MAGIC):start])
+        header = json.loads(str(buffer[start:start + length], "utf-8"))
+        if expected is not None and header["sources"] != expected:
+            raise ValueError("snapshot is stale")
+    except (ValueError, KeyError, struct.error):
+        buffer.release()
+        data.close()
+        return None
+
+    sections = {}
+    for name, (offset, size, typecode) in header["sections"].items():
+        sections[name] = buffer[offset:offset + size].cast(typecode)
+
+    graph = Graph()
+    for name in PERSON_COLUMNS + MOVIE_COLUMNS:
+        setattr(graph, name, StringColumn(
+            sections[f"{name}.offsets"], sections[f"{name}.blob"]
+        ))
+    for name in ["person_offsets", "person_movies",
+                 "movie_offsets", "movie_stars"]:
+        setattr(graph, name, sections[name])
+
+    graph.person_index = SortedIndex(
+        graph.person_ids, sections["person_id_order"]
+    )
+    graph.movie_index = SortedIndex(
+        graph.movie_ids, sections["movie_id_order"]
+    )
+    graph.names = SortedIndex(
+        graph.person_names, sections["person_name_order"],
+        unique=False, fold=True
+    )
+    return graph
+
+
+def write_snapshot(graph, path, sources):
+    """
+    Writes graph to path as a snapshot tagged with the given
+    source fingerprint, replacing any existing file atomically.
+    """
+    sections = {}
+    for name in PERSON_COLUMNS + MOVIE_COLUMNS:
+        offsets, blob = encode_strings(getattr(graph, name))
+        sections[f"{name}.offsets"] = offsets
+        sections[f"{name}.blob"] = blob
+    for name in ["person_offsets", "person_movies",
+                 "movie_offsets", "movie_stars"]:
+        sections[name] = getattr(graph, name)
+
+    people = range(len(graph.person_ids))
+    sections["person_id_order"] = array(
+        "i", sorted(people, key=graph.person_ids.__getitem__)
+    )
+    sections["person_name_order"] = array(
+        "i", sorted(people, key=lambda i: graph.person_names[i].lower())
+    )
+    sections["movie_id_order"] = array(
+        "i", sorted(range(len(graph.movie_ids)),
+                    key=graph.movie_ids.__getitem__)
+    )
+
+    # Lay sections out after the header, each aligned to 8 bytes
+    header = {"sources": sources, "sections": {}}
+    table = {}
+    end = 0
+    sections = {name: memoryview(section)
+                for name, section in sections.items()}
+    for name, section in sections.items():
+        table[name] = [end, section.nbytes, section.format]
+        end = align(end + section.nbytes)
+
+    # The header size depends on the absolute offsets it stores, so
+    # reserve a fixed-width slot big enough for any offset values
+    encoded = json.dumps({"sources": sources, "sections": {
+        name: [2 ** 62, size, typecode]
+        for name, (_, size, typecode) in table.items()
+    }}).encode("utf-8")
+    base = align(len(MAGIC) + 8 + len(encoded))
+    for name, (offset, size, typecode) in table.items():
+        header["sections"][name] = [base + offset, size, typecode]
+    encoded = json.dumps(header).encode("utf-8")
+    encoded += b" " * (base - len(MAGIC) - 8 - len(encoded))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(encoded)))
+            f.write(encoded)
+            for name, section in sections.items():
+                f.seek(header["sections"][name][0])
+                f.write(section)
+            f.truncate(base + end)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def encode_strings(strings):
+    """
+    Returns (offsets, blob) arrays holding strings as UTF-8.
+    """
+    offsets = array("q", [0])
+    blob = array("B")
+    for string in strings:
+        blob.frombytes(string.encode("utf-8"))
+        offsets.append(len(blob))
+    return offsets, blob
+
+
+def align(offset, boundary=8):
+    return (offset + boundary - 1) // boundary * boundary
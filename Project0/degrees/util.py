@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +10,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Counts how many nodes in the frontier hold each state
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +29,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard(node)
             return node
 
+    def discard(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +47,94 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard(node)
             return node
+
+
+def bidirectional_search(source, target, actions, results, limit=None):
+    """
+    Returns the shortest list of (action, state) pairs leading from source
+    to target, where actions(state) yields the actions available in a state
+    and results(action) yields every state that action connects.
+    Searches from both ends at once, always expanding the smaller frontier
+    by one full level. If no possible path, returns None.
+
+    Each side expands an action at most once: the first time it is used,
+    every state it connects is reached, so later uses add nothing. States
+    are then visited straight from results without building neighbor sets.
+
+    If limit is given, the search stops once no path of at most limit
+    actions remains to be found, and returns None.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached state to the (action, state) pair it was reached from
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    forward_depth = backward_depth = 0
+    expanded = (set(), set())
+
+    while forward_frontier and backward_frontier:
+
+        # Every path of forward_depth + backward_depth actions or fewer
+        # would already have been found
+        if limit is not None and forward_depth + backward_depth >= limit:
+            return None
+
+        # Grow whichever side currently has fewer states to expand
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, reached, other = forward_frontier, forward, backward
+            forward_depth += 1
+        else:
+            frontier, reached, other = backward_frontier, backward, forward
+            backward_depth += 1
+        is_forward = reached is forward
+        used = expanded[0 if is_forward else 1]
+
+        next_frontier = []
+        for state in frontier:
+            for action in actions(state):
+                if action in used:
+                    continue
+                used.add(action)
+                for neighbor in results(action):
+                    if neighbor in reached:
+                        continue
+                    reached[neighbor] = (action, state)
+
+                    # The first state reached from both sides
+                    # lies on a shortest path
+                    if neighbor in other:
+                        return join_paths(forward, backward, neighbor)
+                    next_frontier.append(neighbor)
+
+        if is_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Returns the (action, state) pairs from the source of forward search
+    to the source of backward search, passing through meeting.
+    """
+    path = []
+    state = meeting
+    while forward[state] is not None:
+        action, parent = forward[state]
+        path.append((action, state))
+        state = parent
+    path.reverse()
+
+    state = meeting
+    while backward[state] is not None:
+        action, state = backward[state]
+        path.append((action, state))
+    return path
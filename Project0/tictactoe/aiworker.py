@@ -0,0 +1,109 @@
+"""
+Background AI moves for the Tic Tac Toe runner.
+
+The runner's game loop must keep drawing frames and handling input while
+the AI thinks, so searches run on a worker thread and the loop polls for
+the result once per frame.
+"""
+
+from copy import deepcopy
+import threading
+
+
+class AIWorker():
+    """
+    Runs one move search at a time on a daemon thread.
+
+    search is called with the state and returns a move. A search that
+    can be asked to finish early is given instead as a factory returning
+    a fresh searcher with best_move and stop methods, for example
+    lambda: mnk.Search(game, budget=1.0). Every search then gets its own
+    searcher, so one still running after a cancel shares nothing with
+    the next, and starting a new search or cancelling stops the old one.
+    Either way, starting or cancelling discards the result of any search
+    still running.
+
+    The search runs on a copy of the state it is started with, so the
+    caller may change its own state meanwhile. The copy is made with the
+    given copy function, by default deepcopy, which copies nested
+    list boards and returns immutable states such as mnk's as they are.
+    """
+
+    def __init__(self, search=None, factory=None, copy=deepcopy):
+        if (search is None) == (factory is None):
+            raise ValueError("give either a search or a searcher factory")
+        self.search = search
+        self.factory = factory
+        self.copy = copy
+        self.lock = threading.Lock()
+
+        # Each search is numbered; only the latest one may publish a move
+        self.generation = 0
+        self.finished = False
+        self.move = None
+        self.error = None
+
+        # Stops the searcher of the latest search, if it can be stopped
+        self.stop = None
+
+    def start(self, state):
+        """
+        Starts searching for a move from state in the background.
+        """
+        if self.factory is None:
+            search, stop = self.search, None
+        else:
+            searcher = self.factory()
+            search, stop = searcher.best_move, searcher.stop
+        with self.lock:
+            self.generation += 1
+            self.finished = False
+            self.move = None
+            self.error = None
+            generation = self.generation
+            previous, self.stop = self.stop, stop
+        if previous is not None:
+            previous()
+        thread = threading.Thread(
+            target=self.run, args=(generation, search, self.copy(state)),
+            daemon=True
+        )
+        thread.start()
+
+    def run(self, generation, search, state):
+        move = None
+        error = None
+        try:
+            move = search(state)
+        except Exception as e:
+            error = e
+        finally:
+
+            # Always finish the search, so a failing one cannot leave
+            # the caller waiting for it forever
+            with self.lock:
+                if generation == self.generation:
+                    self.move = move
+                    self.error = error
+                    self.finished = True
+
+    def done(self):
+        """
+        Returns True if the latest search has finished. If it failed,
+        move is None and error holds the exception it raised.
+        """
+        with self.lock:
+            return self.finished
+
+    def cancel(self):
+        """
+        Abandons the running search, if any.
+        """
+        with self.lock:
+            self.generation += 1
+            self.finished = False
+            self.move = None
+            self.error = None
+            stop, self.stop = self.stop, None
+        if stop is not None:
+            stop()
@@ -0,0 +1,152 @@
+"""
+Batched position evaluation for Tic Tac Toe
+
+Every board has a base-3 code (EMPTY = 0, X = 1, O = 2 for cell 3 * i + j,
+as in book.py), so the winner, terminal flag, utility and optimal move of
+all 3 ** 9 boards fit in small lookup tables. They are computed once, after
+which evaluating a batch is a single encode-and-index step. With NumPy
+installed, boards given as an (N, 9) integer array are evaluated without
+any Python loop; otherwise any sequence of 9-cell rows is accepted.
+"""
+
+from array import array
+from collections import namedtuple
+
+import bitboard
+import book
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Cell values in the batch encoding
+EMPTY = 0
+X = 1
+O = 2
+
+# Move value for boards that have no move
+NO_MOVE = -1
+
+# Place value of each cell in a board's base-3 code
+POWERS = [3 ** cell for cell in range(9)]
+
+# Per-board results of a batch, in input order. Winners use the cell
+# values above (EMPTY for none) and moves are cells 3 * i + j.
+Evaluation = namedtuple("Evaluation", ["winners", "terminal", "utilities",
+                                       "moves"])
+
+# Lookup tables over every code, built on first use
+tables = None
+
+
+def evaluate(boards):
+    """
+    Returns the Evaluation of each board in boards, given as rows of
+    9 cell values. NumPy arrays give NumPy arrays back, and anything else
+    gives lists.
+    """
+    winners, terminal, utilities, moves = lookup_tables()
+    if np is not None and isinstance(boards, np.ndarray):
+        if boards.ndim != 2 or boards.shape[1] != 9:
+            raise ValueError("boards must have shape (N, 9)")
+        if boards.size and (boards.min() < EMPTY or boards.max() > O):
+            raise ValueError("cells must be 0, 1 or 2")
+        codes = boards.astype(np.int32) @ np.array(POWERS, dtype=np.int32)
+        return Evaluation(
+            np.frombuffer(winners, dtype=np.int8)[codes],
+            np.frombuffer(terminal, dtype=np.bool_)[codes],
+            np.frombuffer(utilities, dtype=np.int8)[codes],
+            np.frombuffer(moves, dtype=np.int8)[codes],
+        )
+
+    codes = [encode(board) for board in boards]
+    return Evaluation(
+        [winners[code] for code in codes],
+        [bool(terminal[code]) for code in codes],
+        [utilities[code] for code in codes],
+        [moves[code] for code in codes],
+    )
+
+
+def encode(board):
+    """
+    Returns the base-3 code of a row of 9 cell values.
+    """
+    if len(board) != 9:
+        raise ValueError("boards must have 9 cells")
+    code = 0
+    for cell, power in zip(board, POWERS):
+        if cell not in (EMPTY, X, O):
+            raise ValueError("cells must be 0, 1 or 2")
+        code += cell * power
+    return code
+
+
+def from_boards(boards):
+    """
+    Returns nested-list boards from tictactoe.py as rows of cell values,
+    as an (N, 9) int8 array if NumPy is installed.
+    """
+    values = {None: EMPTY, "X": X, "O": O}
+    rows = [[values[cell] for row in board for cell in row]
+            for board in boards]
+    if np is not None:
+        return np.array(rows, dtype=np.int8).reshape(-1, 9)
+    return rows
+
+
+def lookup_tables():
+    """
+    Returns the (winners, terminal, utilities, moves) tables,
+    building them on first use.
+    """
+    global tables
+    if tables is None:
+        tables = build_tables()
+    return tables
+
+
+def build_tables():
+    """
+    Returns the lookup tables for every base-3 code. Codes that are not
+    legal positions get a winner and utility from their lines but no move.
+    """
+    size = 3 ** 9
+    winners = array("b", bytes(size))
+    terminal = array("b", bytes(size))
+    utilities = array("b", bytes(size))
+    moves = array("b", [NO_MOVE]) * size
+
+    table = book.load_book()
+    if table is None:
+        table = book.build()
+
+    values = {None: EMPTY, bitboard.X: X, bitboard.O: O}
+    for code in range(size):
+        x = o = 0
+        rest = code
+        for cell in range(9):
+            rest, value = divmod(rest, 3)
+            if value == X:
+                x |= 1 << cell
+            elif value == O:
+                o |= 1 << cell
+        state = (x, o)
+
+        winners[code] = values[bitboard.winner(state)]
+        terminal[code] = bitboard.terminal(state)
+        utilities[code] = bitboard.utility(state)
+
+        # Only boards where X has played as often as O, or once more,
+        # can arise in a game and have a move to make
+        lead = bitboard.COUNTS[x] - bitboard.COUNTS[o]
+        if terminal[code] or lead not in (0, 1):
+            continue
+        if table[code] != book.NO_MOVE:
+            moves[code] = table[code]
+        else:
+            i, j = bitboard.minimax(state)
+            moves[code] = 3 * i + j
+
+    return winners, terminal, utilities, moves
@@ -0,0 +1,321 @@
+"""
+Bitboard Tic Tac Toe
+
+A state is a pair of 9-bit masks (x, o), where bit 3 * i + j is set if
+X (or O) has played cell (i, j). Moves are a single OR, and wins are
+looked up in a table over all 512 masks, so the search never copies or
+rescans a board. The functions mirror those of tictactoe.py.
+"""
+
+import math
+from collections import OrderedDict
+
+X = "X"
+O = "O"
+
+# Mask of every cell on the board
+FULL = 0b111111111
+
+# Every row, column and diagonal that wins the game
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Whether each mask of played cells contains a winning line
+WINNING = bytes(
+    any(mask & line == line for line in WIN_MASKS) for mask in range(512)
+)
+
+# Number of cells played in each mask
+COUNTS = bytes(bin(mask).count("1") for mask in range(512))
+
+
+def threats(mask):
+    """
+    Returns the cells that would complete a line for a player holding mask.
+    """
+    cells = 0
+    for line in WIN_MASKS:
+        if COUNTS[mask & line] == 2:
+            cells |= line & ~mask
+    return cells
+
+
+# Threatened cells for every mask
+THREATS = [threats(mask) for mask in range(512)]
+
+# Cells in search order: center, then corners, then edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Every rotation and reflection of the board, as the cell
+# that lands on each cell
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),
+]
+
+# Each mask transformed by each symmetry
+SYMMETRIC_MASKS = [
+    [sum(1 << k for k, cell in enumerate(symmetry) if mask >> cell & 1)
+     for mask in range(512)]
+    for symmetry in SYMMETRIES
+]
+
+# Kinds of value stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable():
+    """
+    Bounded cache of searched board values, keyed by canonical board
+    encoding, so positions reached by different move orders or equal up
+    to symmetry are only searched once. Values found under an alpha-beta
+    window are stored as exact values or as lower or upper bounds.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key, alpha, beta):
+        """
+        Returns the stored value of key if it settles the search within
+        (alpha, beta), or None if the board must be searched.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, kind = entry
+            if (kind == EXACT
+                    or (kind == LOWER and value >= beta)
+                    or (kind == UPPER and value <= alpha)):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def store(self, key, value, alpha, beta):
+        """
+        Stores the value found for key by a search within (alpha, beta),
+        evicting the least recently used entry if the table is full.
+        """
+        if value <= alpha:
+            kind = UPPER
+        elif value >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        self.entries[key] = (value, kind)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Transposition table shared by every search
+table = TranspositionTable()
+
+# Number of positions negamax has visited, for benchmarking
+nodes = 0
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return 0, 0
+
+
+def from_board(board):
+    """
+    Returns the state for a board of nested lists.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(state):
+    """
+    Returns the board of nested lists for a state.
+    """
+    x, o = state
+    board = [[None, None, None], [None, None, None], [None, None, None]]
+    for cell in range(9):
+        if x >> cell & 1:
+            board[cell // 3][cell % 3] = X
+        elif o >> cell & 1:
+            board[cell // 3][cell % 3] = O
+    return board
+
+
+def player(state):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = state
+    return X if COUNTS[x] <= COUNTS[o] else O
+
+
+def actions(state):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    x, o = state
+    played = x | o
+    return {(cell // 3, cell % 3) for cell in range(9)
+            if not played >> cell & 1}
+
+
+def result(state, action):
+    """
+    Returns the state that results from making move (i, j) on the board.
+    """
+    x, o = state
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3) or (x | o) >> (3 * i + j) & 1:
+        raise Exception("The move is not allowed")
+    bit = 1 << (3 * i + j)
+    if COUNTS[x] <= COUNTS[o]:
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = state
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = state
+    return bool(WINNING[x] or WINNING[o] or x | o == FULL)
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = state
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def value(state):
+    """
+    Returns the utility of the board under optimal play by both sides.
+    """
+    x, o = state
+    if terminal(state):
+        return utility(state)
+    if player(state) == X:
+        return negamax(x, o, -math.inf, math.inf)
+    return -negamax(o, x, -math.inf, math.inf)
+
+
+def minimax(state):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    if terminal(state):
+        return None
+
+    x, o = state
+    me, them = (x, o) if player(state) == X else (o, x)
+    played = x | o
+    alpha = -math.inf
+    best = None
+    for cell in MOVE_ORDER:
+        bit = 1 << cell
+        if played & bit:
+            continue
+        if WINNING[me | bit]:
+            return cell // 3, cell % 3
+        v = -negamax(them, me | bit, -math.inf, -alpha)
+        if v > alpha:
+            alpha = v
+            best = cell
+            if alpha == 1:
+                break
+    return best // 3, best % 3
+
+
+def negamax(me, them, alpha, beta):
+    """
+    Returns the value of the board for the player to move, who has played
+    the cells in me against the cells in them: 1 for a win, -1 for a loss
+    and 0 for a tie, pruning moves that cannot matter within (alpha, beta).
+    """
+    global nodes
+    nodes += 1
+    if WINNING[them]:
+        return -1
+    played = me | them
+    if played == FULL:
+        return 0
+
+    # Winning immediately is always the best move
+    if THREATS[me] & ~played:
+        return 1
+
+    key = canonical(me, them)
+    known = table.lookup(key, alpha, beta)
+    if known is not None:
+        return known
+
+    v = -math.inf
+    window = (alpha, beta)
+    for cell in MOVE_ORDER:
+        bit = 1 << cell
+        if played & bit:
+            continue
+        v = max(v, -negamax(them, me | bit, -beta, -alpha))
+        if v >= beta:
+            break
+        alpha = max(alpha, v)
+    table.store(key, v, *window)
+    return v
+
+
+def canonical(me, them):
+    """
+    Returns an integer encoding of the board that is the same
+    for all of its rotations and reflections.
+    """
+    return min(masks[me] | masks[them] << 9 for masks in SYMMETRIC_MASKS)
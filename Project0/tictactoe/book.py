@@ -0,0 +1,108 @@
+"""
+Opening book for Tic Tac Toe
+
+Stores the optimal move for every reachable position, solved once ahead
+of time, so play needs no search at all. The table is indexed by the
+base-3 encoding of a board (EMPTY = 0, X = 1, O = 2 for cell 3 * i + j),
+one byte per board holding the cell to play, and is written to book.bin
+next to this file. Rebuild it with:
+
+    python book.py
+"""
+
+import os
+
+import bitboard
+
+MAGIC = b"TTTBOOK1"
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Number of base-3 board encodings
+SIZE = 3 ** 9
+
+# Byte for boards that have no move: terminal or unreachable
+NO_MOVE = 255
+
+# Base-3 value of the cells set in each 9-bit mask
+TERNARY = [sum(3 ** cell for cell in range(9) if mask >> cell & 1)
+           for mask in range(512)]
+
+
+def main():
+    table = build()
+    write_book(table)
+    positions = sum(move != NO_MOVE for move in table)
+    print(f"Wrote {positions} positions to {PATH}.")
+
+
+def encode(state):
+    """
+    Returns the base-3 encoding of a bitboard state.
+    """
+    x, o = state
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def build():
+    """
+    Returns the book table, solving every position reachable
+    from the initial state with bitboard.minimax.
+    """
+    table = bytearray([NO_MOVE]) * SIZE
+    seen = set()
+    frontier = [bitboard.initial_state()]
+    while frontier:
+        state = frontier.pop()
+        code = encode(state)
+        if code in seen:
+            continue
+        seen.add(code)
+        if bitboard.terminal(state):
+            continue
+
+        i, j = bitboard.minimax(state)
+        table[code] = 3 * i + j
+        for action in bitboard.actions(state):
+            frontier.append(bitboard.result(state, action))
+    return table
+
+
+def write_book(table, path=PATH):
+    """
+    Writes the book table to path.
+    """
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(table)
+
+
+def load_book(path=PATH):
+    """
+    Returns the book table stored at path,
+    or None if there is no valid book there.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if data[:len(MAGIC)] != MAGIC or len(data) != len(MAGIC) + SIZE:
+        return None
+    return data[len(MAGIC):]
+
+
+def lookup(table, state):
+    """
+    Returns the book's action (i, j) for a bitboard state,
+    or None if the book has no move for it.
+    """
+    if table is None:
+        return None
+    move = table[encode(state)]
+    if move == NO_MOVE:
+        return None
+    return divmod(move, 3)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+m,n,k-game Player
+
+Generalizes Tic Tac Toe to a board of any number of rows and columns
+where k in a row wins: 3,3,3 is Tic Tac Toe, 15,15,5 is Gomoku. Boards
+that cannot be searched to the end are searched with iterative-deepening
+alpha-beta under a time budget, scoring unfinished positions with a
+pluggable heuristic, so every move is returned within its deadline.
+
+States are pairs of bit masks (x, o) as in bitboard.py, where bit
+columns * i + j is set if X (or O) has played cell (i, j).
+"""
+
+import math
+import time
+
+X = "X"
+O = "O"
+
+# Score of a won position; heuristic scores stay within half of it, so
+# they never look like a win or loss
+WIN = 1000000
+
+# Nodes searched between checks of the deadline, away from the leaves.
+# Nodes one move from the leaves, whose children are scored by the
+# heuristic, and the leaves themselves check it every time, as scoring
+# can take far longer than the check on large boards
+CHECK_EVERY = 512
+
+# Least factor by which one iteration is expected to take longer than
+# the one before it
+GROWTH = 2
+
+
+class Timeout(Exception):
+    """Raised inside a search when its time budget runs out."""
+
+
+class Game():
+    """
+    Rules of an m,n,k-game, with lines and neighborhoods precomputed
+    as bit masks.
+    """
+
+    def __init__(self, rows=3, columns=3, k=3, radius=None):
+        """
+        radius, if given, limits searched moves to empty cells within that
+        many rows and columns of a played cell, which keeps large boards
+        tractable at the cost of ignoring far-off moves.
+        """
+        if not 1 <= k <= max(rows, columns):
+            raise ValueError("k must fit on the board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.cells = rows * columns
+        self.full = (1 << self.cells) - 1
+
+        # Every line of k cells, and the lines through each cell
+        self.lines = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < columns:
+                        self.lines.append(sum(
+                            1 << self.cell(i + di * step, j + dj * step)
+                            for step in range(k)
+                        ))
+        self.cell_lines = [[] for _ in range(self.cells)]
+        for line in self.lines:
+            for cell in range(self.cells):
+                if line >> cell & 1:
+                    self.cell_lines[cell].append(line)
+
+        # Cells within radius of each cell
+        self.radius = radius
+        self.near = []
+        for cell in range(self.cells):
+            i, j = divmod(cell, columns)
+            reach = radius if radius is not None else max(rows, columns)
+            self.near.append(sum(
+                1 << self.cell(a, b)
+                for a in range(max(0, i - reach), min(rows, i + reach + 1))
+                for b in range(max(0, j - reach), min(columns, j + reach + 1))
+            ))
+
+        # Cells from the center outwards, the default search order
+        center = ((rows - 1) / 2, (columns - 1) / 2)
+        self.order = sorted(range(self.cells), key=lambda cell: (
+            max(abs(cell // columns - center[0]),
+                abs(cell % columns - center[1])),
+            cell
+        ))
+
+    def cell(self, i, j):
+        return i * self.columns + j
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return 0, 0
+
+    def player(self, state):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = state
+        return X if count(x) <= count(o) else O
+
+    def actions(self, state):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        x, o = state
+        played = x | o
+        return {divmod(cell, self.columns) for cell in range(self.cells)
+                if not played >> cell & 1}
+
+    def result(self, state, action):
+        """
+        Returns the state that results from making move (i, j) on the board.
+        """
+        x, o = state
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.columns):
+            raise Exception("The move is not allowed")
+        bit = 1 << self.cell(i, j)
+        if (x | o) & bit:
+            raise Exception("The move is not allowed")
+        if count(x) <= count(o):
+            return x | bit, o
+        return x, o | bit
+
+    def winner(self, state):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = state
+        for line in self.lines:
+            if x & line == line:
+                return X
+            if o & line == line:
+                return O
+        return None
+
+    def terminal(self, state):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = state
+        return self.winner(state) is not None or x | o == self.full
+
+    def utility(self, state):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(state)]
+
+    def wins(self, mask, cell):
+        """
+        Returns True if mask has a complete line through cell.
+        """
+        for line in self.cell_lines[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def candidates(self, me, them):
+        """
+        Returns the empty cells worth searching, in default order.
+        """
+        played = me | them
+        if self.radius is None or not played:
+            allowed = self.full & ~played
+        else:
+            allowed = 0
+            stones = played
+            while stones:
+                low = stones & -stones
+                allowed |= self.near[low.bit_length() - 1]
+                stones ^= low
+            allowed &= ~played
+            if not allowed:
+                allowed = self.full & ~played
+        return [cell for cell in self.order if allowed >> cell & 1]
+
+
+def line_heuristic(game, me, them):
+    """
+    Scores a position for the player to move by their open lines: each
+    line holding only one player's stones counts for that player, more so
+    the fuller it is. Returns a score strictly between -WIN / 2 and WIN / 2.
+    """
+    score = 0
+    for line in game.lines:
+        mine = me & line
+        theirs = them & line
+        if mine and not theirs:
+            score += 4 ** count(mine)
+        elif theirs and not mine:
+            score -= 4 ** count(theirs)
+    return WIN / 2 * score / (abs(score) + 4 ** game.k)
+
+
+class Search():
+    """
+    Iterative-deepening alpha-beta search for one move.
+    """
+
+    def __init__(self, game, evaluate=line_heuristic, budget=1.0,
+                 max_depth=None):
+        self.game = game
+        self.evaluate = evaluate
+        self.budget = budget
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = None
+
+        # Whether the last iteration scored any position heuristically
+        self.cutoff = False
+
+    def best_move(self, state):
+        """
+        Returns the best action (i, j) found for the player to move within
+        the time budget, or None if the game is over.
+        """
+        game = self.game
+        if game.terminal(state):
+            return None
+
+        x, o = state
+        me, them = (x, o) if game.player(state) == X else (o, x)
+        moves = game.candidates(me, them)
+        self.deadline = time.perf_counter() + self.budget
+        self.nodes = 0
+
+        # Take a winning move or block the opponent's without searching
+        for cell in moves:
+            if game.wins(me | 1 << cell, cell):
+                return divmod(cell, game.columns)
+        for cell in moves:
+            if game.wins(them | 1 << cell, cell):
+                return divmod(cell, game.columns)
+
+        best = moves[0]
+        empty = count(game.full & ~(me | them))
+        limit = empty if self.max_depth is None else min(empty,
+                                                         self.max_depth)
+        previous = None
+        for depth in range(1, limit + 1):
+            self.cutoff = False
+            start = time.perf_counter()
+            try:
+                scores = self.root(me, them, moves, depth)
+            except Timeout:
+                break
+            self.depth = depth
+
+            # Search the best moves of this iteration first in the next
+            moves.sort(key=lambda cell: -scores[cell])
+            best = moves[0]
+
+            # Stop once the result is known exactly
+            if not self.cutoff or abs(scores[best]) > WIN - game.cells - 1:
+                break
+
+            # Stop before an iteration that could not finish in time,
+            # expecting it to grow by as much as this one did
+            now = time.perf_counter()
+            spent = now - start
+            growth = GROWTH
+            if previous:
+                growth = max(growth, spent / previous)
+            if now + spent * growth > self.deadline:
+                break
+            previous = spent
+        return divmod(best, game.columns)
+
+    def stop(self):
+        """
+        Makes a running best_move return its best move so far
+        at the next deadline check.
+        """
+        self.deadline = -math.inf
+
+    def root(self, me, them, moves, depth):
+        """
+        Returns the score of each move searched to depth.
+        """
+        alpha = -math.inf
+        scores = {}
+        for cell in moves:
+            bit = 1 << cell
+            score = -self.negamax(them, me | bit, cell, depth - 1,
+                                  -math.inf, -alpha, 1)
+            scores[cell] = score
+            alpha = max(alpha, score)
+        return scores
+
+    def negamax(self, me, them, last, depth, alpha, beta, ply):
+        """
+        Returns the score of the position for the player to move, whose
+        opponent has just played cell last.
+        """
+        self.nodes += 1
+        if (depth <= 1 or self.nodes % CHECK_EVERY == 0) \
+                and time.perf_counter() > self.deadline:
+            raise Timeout
+
+        game = self.game
+        if game.wins(them, last):
+            return ply - WIN
+        if me | them == game.full:
+            return 0
+        if depth == 0:
+            self.cutoff = True
+            return self.evaluate(game, me, them)
+
+        moves = game.candidates(me, them)
+        v = -math.inf
+        for cell in moves:
+            bit = 1 << cell
+            v = max(v, -self.negamax(them, me | bit, cell, depth - 1,
+                                     -beta, -alpha, ply + 1))
+            if v >= beta:
+                break
+            alpha = max(alpha, v)
+        return v
+
+
+def count(mask):
+    """
+    Returns the number of cells set in mask.
+    """
+    return bin(mask).count("1")
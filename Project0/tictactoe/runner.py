@@ -3,6 +3,7 @@ import sys
 import time
 
 import tictactoe as ttt
+from aiworker import AIWorker
 
 pygame.init()
 size = width, height = 600, 400
@@ -21,6 +22,10 @@ user = None
 board = ttt.initial_state()
 ai_turn = False
 
+# Searches for AI moves in the background so frames keep being drawn
+worker = AIWorker(ttt.minimax)
+ai_started = 0
+
 while True:
 
     for event in pygame.event.get():
@@ -108,14 +113,18 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, applying it once the search is done and
+        # at least half a second has passed
         if user != player and not game_over:
             if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+                if worker.done() and time.time() - ai_started >= 0.5:
+                    if worker.error is not None:
+                        raise worker.error
+                    board = ttt.result(board, worker.move)
+                    ai_turn = False
             else:
+                worker.start(board)
+                ai_started = time.time()
                 ai_turn = True
 
         # Check for a user move
@@ -141,6 +150,7 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
+                    worker.cancel()
                     ai_turn = False
 
     pygame.display.flip()
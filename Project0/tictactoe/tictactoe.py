@@ -2,13 +2,16 @@
 Tic Tac Toe Player
 """
 
-import math
-import copy
+import bitboard
+import book
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Precomputed optimal moves, or None if book.bin has not been built
+opening_book = book.load_book()
+
 
 def initial_state():
     """
@@ -70,42 +73,18 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    # Error handling when a wrong move is made
-    permissible_actions = actions(board)
-    if action not in permissible_actions:
-        raise Exception("The move is not allowed")
-
-    current_board = copy.deepcopy(board)
-    current_board[action[0]][action[1]] = player(current_board)
-
-    return current_board
+    # Make the move on the bitboard form of the board, which raises
+    # an exception if the move is not allowed
+    state = bitboard.result(bitboard.from_board(board), action)
+    return bitboard.to_board(state)
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    # Assess board for player X and player 0
-    for target in [X, O]:
-
-        # Confirm if any row is complete for a player
-        for i in range(3):
-            if all(board[i][j] == target for j in range(3)):
-                return target
-
-        # Confirm if any column is complete for a player
-        for j in range(3):
-            if all(board[i][j] == target for i in range(3)):
-                return target
-
-        # Confirm if any crosswise pattern is complete for a player
-        crosswise = [[(0, 0), (1, 1), (2, 2)], [(2, 0), (1, 1), (0, 2)]]
-        for cross in crosswise:
-            if all(board[i][j] == target for (i, j) in cross):
-                return target
-      
-    # When there is no winner
-    return None
+    # Each player's cells are looked up in a table of winning masks
+    return bitboard.winner(bitboard.from_board(board))
 
 
 def terminal(board):
@@ -113,22 +92,14 @@ def terminal(board):
     Returns True if game is over, False otherwise.
     """
     # Terminate game if there is no more move(tie) or if there is a winner
-    if not actions(board) or winner(board) is not None:
-        return True
-    else:  # If game is still on
-        return False
+    return bitboard.terminal(bitboard.from_board(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
+    return bitboard.utility(bitboard.from_board(board))
 
 
 def minimax(board):
@@ -144,50 +115,24 @@ def minimax(board):
     if board == initial_state():
         return i, j
 
-    if player(board) == X:
-        v = -math.inf
-
-    if player(board) == O:
-        v = math.inf
-
-    for action in actions(board):
-
-        if player(board) == X:
-            new_v = max(v, min_value(result(board, action)))
-
-        if player(board) == O:
-            new_v = min(v, max_value(result(board, action)))
-
-        if new_v != v:
-            v = new_v
-            optimal_action = action
-
-    return optimal_action
+    # Look the move up in the opening book, and otherwise search on the
+    # bitboard form of the board, which never copies boards
+    state = bitboard.from_board(board)
+    move = book.lookup(opening_book, state)
+    if move is not None:
+        return move
+    return bitboard.minimax(state)
 
 
 def max_value(board):
     """
     Returns the maximum utility of the current board.
     """
-
-    if terminal(board):
-        return utility(board)
-
-    v = -math.inf
-    for action in actions(board):
-        v = max(v, min_value(result(board, action)))
-    return v
+    return bitboard.value(bitboard.from_board(board))
 
 
 def min_value(board):
     """
     Returns the minimum utility of the current board.
     """
-
-    if terminal(board):
-        return utility(board)
-
-    v = math.inf
-    for action in actions(board):
-        v = min(v, max_value(result(board, action)))
-    return v
+    return bitboard.value(bitboard.from_board(board))
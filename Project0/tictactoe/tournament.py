@@ -0,0 +1,186 @@
+"""
+Headless self-play tournament for Tic Tac Toe
+
+Plays every pair of strategies against each other, each side taking X and
+O equally often, with games spread across a process pool. Reports the
+outcome of each pairing and, per strategy, the time and search nodes
+spent per move. Optimal strategies never losing is a correctness check,
+and their time per move is a benchmark for search changes.
+
+    python tournament.py [--games N] [--workers N] [--strategies NAME ...]
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import random
+import time
+
+import bitboard
+import mnk
+import tictactoe as ttt
+
+# Strategies that play perfectly and so must never lose
+OPTIMAL = {"minimax", "search", "search-cold", "mnk"}
+
+# Game used by the mnk strategy
+GAME = mnk.Game()
+
+
+def random_player(board, rng):
+    """
+    Plays any available move.
+    """
+    return rng.choice(sorted(ttt.actions(board))), 0
+
+
+def greedy_player(board, rng):
+    """
+    Wins if it can, blocks the opponent if it must, and otherwise
+    plays any available move.
+    """
+    turn = ttt.player(board)
+    other = ttt.O if turn == ttt.X else ttt.X
+    moves = sorted(ttt.actions(board))
+    for who in [turn, other]:
+        for move in moves:
+            trial = [row.copy() for row in board]
+            trial[move[0]][move[1]] = who
+            if ttt.winner(trial) == who:
+                return move, 0
+    return rng.choice(moves), 0
+
+
+def minimax_player(board, rng):
+    """
+    Plays tictactoe.minimax, which consults the opening book first.
+    """
+    before = bitboard.nodes
+    move = ttt.minimax(board)
+    return move, bitboard.nodes - before
+
+
+def search_player(board, rng):
+    """
+    Plays bitboard.minimax with the shared transposition table.
+    """
+    before = bitboard.nodes
+    move = bitboard.minimax(bitboard.from_board(board))
+    return move, bitboard.nodes - before
+
+
+def cold_search_player(board, rng):
+    """
+    Plays bitboard.minimax from an empty transposition table every move.
+    """
+    bitboard.table.clear()
+    return search_player(board, rng)
+
+
+def mnk_player(board, rng):
+    """
+    Plays the m,n,k engine on the 3x3 board.
+    """
+    search = mnk.Search(GAME, budget=1.0)
+    move = search.best_move(bitboard.from_board(board))
+    return move, search.nodes
+
+
+STRATEGIES = {
+    "random": random_player,
+    "greedy": greedy_player,
+    "minimax": minimax_player,
+    "search": search_player,
+    "search-cold": cold_search_player,
+    "mnk": mnk_player,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Tic Tac Toe strategies against each other."
+    )
+    parser.add_argument("--games", type=int, default=100,
+                        help="games per pairing and side")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes to play games in")
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES),
+                        choices=list(STRATEGIES))
+    args = parser.parse_args()
+
+    results = tournament(args.strategies, args.games, args.workers)
+    report(results)
+
+
+def tournament(strategies, games, workers=None):
+    """
+    Plays games games of every ordered pair of strategies, and returns
+    the result of each game.
+    """
+    jobs = [
+        (x, o, seed)
+        for x, o in itertools.product(strategies, repeat=2)
+        for seed in range(games)
+    ]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.starmap(play, jobs, chunksize=max(1, len(jobs) // 64))
+
+
+def play(x, o, seed):
+    """
+    Plays one game with strategy x as X and strategy o as O.
+    Returns a dictionary with the strategies, the winner (X, O or None),
+    and the time and nodes each side spent on each of its moves.
+    """
+    rng = random.Random(seed)
+    players = {ttt.X: x, ttt.O: o}
+    moves = {ttt.X: [], ttt.O: []}
+    board = ttt.initial_state()
+    while not ttt.terminal(board):
+        turn = ttt.player(board)
+        start = time.perf_counter()
+        move, nodes = STRATEGIES[players[turn]](board, rng)
+        moves[turn].append((time.perf_counter() - start, nodes))
+        board = ttt.result(board, move)
+    return {"x": x, "o": o, "winner": ttt.winner(board),
+            "moves": moves}
+
+
+def report(results):
+    """
+    Prints outcome stats per pairing and move stats per strategy.
+    """
+    print(f"{'X':<12} {'O':<12} {'X wins':>7} {'O wins':>7} {'ties':>7}")
+    pairings = {}
+    for game in results:
+        outcome = pairings.setdefault((game["x"], game["o"]), [0, 0, 0])
+        outcome[{ttt.X: 0, ttt.O: 1, None: 2}[game["winner"]]] += 1
+    for (x, o), (x_wins, o_wins, ties) in pairings.items():
+        print(f"{x:<12} {o:<12} {x_wins:>7} {o_wins:>7} {ties:>7}")
+
+    print()
+    print(f"{'strategy':<12} {'moves':>7} {'mean (us)':>10} "
+          f"{'p99 (us)':>10} {'nodes/move':>11} {'losses':>7}")
+    stats = {}
+    for game in results:
+        for side, strategy in [(ttt.X, game["x"]), (ttt.O, game["o"])]:
+            moves, losses = stats.setdefault(strategy, ([], [0]))
+            moves.extend(game["moves"][side])
+            if game["winner"] not in [None, side]:
+                losses[0] += 1
+    for strategy, (moves, (losses,)) in stats.items():
+        times = sorted(seconds for seconds, _ in moves)
+        mean = 1e6 * sum(times) / len(times)
+        p99 = 1e6 * times[min(len(times) - 1, len(times) * 99 // 100)]
+        nodes = sum(n for _, n in moves) / len(moves)
+        print(f"{strategy:<12} {len(moves):>7} {mean:>10.1f} "
+              f"{p99:>10.1f} {nodes:>11.1f} {losses:>7}")
+
+    failures = [s for s, (_, (losses,)) in stats.items()
+                if s in OPTIMAL and losses]
+    if failures:
+        print(f"\nOptimal strategies lost games: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
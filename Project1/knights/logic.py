@@ -1,19 +1,119 @@
 import itertools
+import multiprocessing
+import weakref
 
 
 class Sentence():
 
+    # Equal sentences are built as one shared object where possible, with
+    # their hash and symbols computed once
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Every shared sentence, by key
+    interned = weakref.WeakValueDictionary()
+
+    def __eq__(self, other):
+        return self is other or (
+            isinstance(other, Sentence)
+            and hash(self) == hash(other)
+            and self.key() == other.key()
+        )
+
+    def __hash__(self):
+        # Subclasses may not set the cached values in their constructors
+        if getattr(self, "_hash", None) is None:
+            self._hash = hash(self.key())
+        return self._hash
+
+    def key(self):
+        """Returns a tuple identifying the logical sentence. Sentences
+        that do not say otherwise are only equal to themselves."""
+        return ("sentence", id(self))
+
+    def operands(self):
+        """Returns a list of the sentences this one is built from."""
+        return []
+
+    def shared(self):
+        """Returns the shared sentence equal to this one."""
+        return self
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """Evaluates the logical sentence in a model that may leave symbols
+        out, returning None if its value depends on them."""
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.names())
+
+    def names(self):
+        """Returns a frozenset of all symbols in the logical sentence."""
+        if getattr(self, "_symbols", None) is None:
+            self._symbols = frozenset().union(
+                *[operand.names() for operand in self.operands()]
+            )
+        return self._symbols
+
+    def expression(self, index, bitwise=False):
+        """Returns Python source evaluating the sentence over values `v`,
+        where symbol name `s` has truth value `v[index[s]]`. If bitwise,
+        values are ints of truth values and `m` masks the bits in use."""
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols, bitwise=False):
+        """Returns a function of a sequence of truth values, one per name
+        in symbols, that evaluates the sentence much faster than evaluate.
+
+        If bitwise, the function takes a sequence of ints and a mask
+        instead, and evaluates many models at once: bit j of its result
+        is the sentence's value in the model where each symbol has bit j
+        of its int as its value, for each bit j set in the mask."""
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        missing = self.symbols() - set(index)
+        if missing:
+            raise Exception(f"variable {min(missing)} not in model")
+        try:
+            if bitwise:
+                return eval(f"lambda v, m: {self.expression(index, True)}")
+            return eval(f"lambda v: {self.expression(index)}")
+        except (SyntaxError, RecursionError, MemoryError):
+            pass
+
+        # Too deeply nested for the parser: evaluate the tree instead
+        def evaluate(values, mask=None):
+            if mask is None:
+                return self.evaluate(dict(zip(symbols, values)))
+            result = 0
+            for j in range(mask.bit_length()):
+                model = {symbol: bool(value >> j & 1)
+                         for symbol, value in zip(symbols, values)}
+                if mask >> j & 1 and self.evaluate(model):
+                    result |= 1 << j
+            return result
+        return evaluate
+
+    @staticmethod
+    def intern(cls, key, **fields):
+        """Returns the shared sentence of class cls with key, creating it
+        with fields if there is none yet."""
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                setattr(sentence, name, value)
+            sentence._hash = hash(key)
+            sentence._symbols = fields.get("_symbols")
+            Sentence.interned[key] = sentence
+        return sentence
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +143,17 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return Sentence.intern(cls, ("symbol", name), name=name,
+                               _symbols=frozenset([name]))
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __reduce__(self):
+        return Symbol, (self.name,)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def key(self):
+        return ("symbol", self.name)
 
     def __repr__(self):
         return self.name
@@ -62,23 +164,33 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def expression(self, index, bitwise=False):
+        return f"v[{index[self.name]}]"
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        operand = operand.shared()
+        return Sentence.intern(cls, ("not", operand), operand=operand)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __reduce__(self):
+        return Not, (self.operand,)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def key(self):
+        return ("not", self.operand)
+
+    def operands(self):
+        return [self.operand]
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +198,47 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def expression(self, index, bitwise=False):
+        operand = self.operand.expression(index, bitwise)
+        if bitwise:
+            return f"(m ^ {operand})"
+        return f"(not {operand})"
 
 
 class And(Sentence):
+    # Unlike other sentences, a new And can be added to, so it is only
+    # shared once it becomes part of another sentence, as an equal And
+    # whose conjuncts are a tuple
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        self.conjuncts = [conjunct.shared() for conjunct in conjuncts]
+        self._hash = None
+        self._symbols = None
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+    def __reduce__(self):
+        return And, tuple(self.conjuncts)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def key(self):
+        return ("and", tuple(self.conjuncts))
+
+    def operands(self):
+        return list(self.conjuncts)
+
+    def shared(self):
+        if isinstance(self.conjuncts, tuple):
+            return self
+        conjuncts = tuple(self.conjuncts)
+        return Sentence.intern(And, ("and", conjuncts), conjuncts=conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -115,34 +248,57 @@ class And(Sentence):
 
     def add(self, conjunct):
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        if isinstance(self.conjuncts, tuple):
+            raise Exception("shared sentences cannot be changed")
+        self.conjuncts.append(conjunct.shared())
+        self._hash = None
+        self._symbols = None
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def expression(self, index, bitwise=False):
+        if not self.conjuncts:
+            return "m" if bitwise else "True"
+        return "(" + (" & " if bitwise else " and ").join(
+            [conjunct.expression(index, bitwise)
+             for conjunct in self.conjuncts]
+        ) + ")"
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        disjuncts = tuple(disjunct.shared() for disjunct in disjuncts)
+        return Sentence.intern(cls, ("or", disjuncts), disjuncts=disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    def __reduce__(self):
+        return Or, self.disjuncts
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def key(self):
+        return ("or", self.disjuncts)
+
+    def operands(self):
+        return list(self.disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +307,50 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def expression(self, index, bitwise=False):
+        if not self.disjuncts:
+            return "0" if bitwise else "False"
+        return "(" + (" | " if bitwise else " or ").join(
+            [disjunct.expression(index, bitwise)
+             for disjunct in self.disjuncts]
+        ) + ")"
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        antecedent = antecedent.shared()
+        consequent = consequent.shared()
+        return Sentence.intern(cls, ("implies", antecedent, consequent),
+                               antecedent=antecedent, consequent=consequent)
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+    def __reduce__(self):
+        return Implication, (self.antecedent, self.consequent)
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def key(self):
+        return ("implies", self.antecedent, self.consequent)
+
+    def operands(self):
+        return [self.antecedent, self.consequent]
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +359,49 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is None or consequent is None:
+            return None
+        return False
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def expression(self, index, bitwise=False):
+        antecedent = self.antecedent.expression(index, bitwise)
+        consequent = self.consequent.expression(index, bitwise)
+        if bitwise:
+            return f"((m ^ {antecedent}) | {consequent})"
+        return f"((not {antecedent}) or {consequent})"
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        left = left.shared()
+        right = right.shared()
+        return Sentence.intern(cls, ("biconditional", left, right),
+                               left=left, right=right)
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+    def __reduce__(self):
+        return Biconditional, (self.left, self.right)
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def key(self):
+        return ("biconditional", self.left, self.right)
+
+    def operands(self):
+        return [self.left, self.right]
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,48 +412,158 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+    def expression(self, index, bitwise=False):
+        left = self.left.expression(index, bitwise)
+        right = self.right.expression(index, bitwise)
+        if bitwise:
+            return f"(m ^ {left} ^ {right})"
+        return f"((not {left}) == (not {right}))"
+
+
+# Number of symbols whose assignments are evaluated together, as the bits
+# of one int: 2 ** CHUNK models at a time
+CHUNK = 20
+
+# Chunks of models per task given to each process in a parallel check
+TASKS_PER_PROCESS = 8
+
+# Checker of the parallel model_check running in this worker process
+checker = None
+
+
+def model_check(knowledge, query, processes=1):
+    """Checks if knowledge base entails query.
+
+    With more than one process, or None for one per CPU, the models are
+    split between a pool of processes, and the check stops as soon as
+    any of them finds a model where knowledge is true and query false."""
+
+    # Get all symbols in both knowledge and query, each given an index
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    if processes == 1:
+        checker = Checker(knowledge, query, symbols, CHUNK)
+        return checker.check(range(checker.chunks))
+
+    # Split the models into enough chunks for every process to have
+    # several tasks, so that early ones can stop the rest
+    processes = processes or multiprocessing.cpu_count()
+    split = (processes * TASKS_PER_PROCESS).bit_length()
+    inner = max(min(len(symbols) - split, CHUNK), 0)
+    chunks = 1 << (len(symbols) - inner)
+    size = max(chunks // (processes * TASKS_PER_PROCESS), 1)
+    tasks = [range(start, min(start + size, chunks))
+             for start in range(0, chunks, size)]
+
+    with multiprocessing.Pool(
+        processes, initializer=start_checker,
+        initargs=(knowledge, query, symbols, inner)
+    ) as pool:
+        for entailed in pool.imap_unordered(check_chunks, tasks):
+            if not entailed:
+                return False
+    return True
+
+
+def start_checker(knowledge, query, symbols, inner):
+    """Compiles the sentences of a parallel model_check in a worker."""
+    global checker
+    checker = Checker(knowledge, query, symbols, inner)
+
+
+def check_chunks(chunks):
+    """Checks one task of a parallel model_check in a worker."""
+    return checker.check(chunks)
+
+
+class Checker():
+    """Checks that a knowledge base entails a query one chunk of models at
+    a time, evaluating every model in a chunk at once."""
+
+    def __init__(self, knowledge, query, symbols, inner):
+        """Each chunk holds the models of the first inner symbols, with the
+        rest given by the bits of the chunk's number."""
+        self.sentences = (knowledge, query)
+        self.symbols = symbols
+
+        # Compile both sentences to evaluate many models at once
+        self.knowledge = knowledge.compile(symbols, bitwise=True)
+        self.query = query.compile(symbols, bitwise=True)
+
+        # Bit j of a chunk is the model where the first symbols take the
+        # values of the bits of j, and the rest take the bits of the chunk
+        self.inner = min(len(symbols), inner)
+        self.outer = len(symbols) - self.inner
+        self.chunks = 1 << self.outer
+        self.mask = (1 << (1 << self.inner)) - 1
+        self.patterns = [bit_pattern(i, self.inner)
+                         for i in range(self.inner)]
+
+    def check(self, chunks):
+        """Checks the models in each chunk numbered in chunks."""
+        return self.check_all(chunks, 0, self.outer, dict())
+
+    def check_all(self, chunks, first, level, model):
+        """Checks the chunks in chunks from first up to first + 2 ** level,
+        which share the values of the later symbols given in model."""
+        if first >= chunks.stop or first + (1 << level) <= chunks.start:
             return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+        # Skip every chunk if the symbols assigned so far already make
+        # knowledge base false or query true, and stop if they make
+        # knowledge base true and query false
+        knowledge, query = self.sentences
+        known = knowledge.evaluate_partial(model)
+        if known is False:
+            return True
+        entailed = query.evaluate_partial(model)
+        if entailed is True:
+            return True
+        if known is True and entailed is False:
+            return False
+
+        if level == 0:
+            values = self.patterns + [self.mask if first >> i & 1 else 0
+                                      for i in range(self.outer)]
+
+            # In every model where knowledge base is true, query must
+            # also be true
+            return not (self.knowledge(values, self.mask)
+                        & ~self.query(values, self.mask))
+
+        # Choose the latest symbol not yet assigned, which is bit
+        # level - 1 of the chunk number, and try both values
+        p = self.symbols[self.inner + level - 1]
+        model[p] = False
+        entailed = self.check_all(chunks, first, level - 1, model)
+        if entailed:
+            model[p] = True
+            entailed = self.check_all(chunks, first + (1 << level - 1),
+                                      level - 1, model)
+        del model[p]
+        return entailed
+
+
+def bit_pattern(i, size):
+    """Returns the int whose bit j is bit i of j, for j below 2 ** size."""
+    width = 1 << i
+    pattern = ((1 << width) - 1) << width
+    width *= 2
+    while width < 1 << size:
+        pattern |= pattern << width
+        width *= 2
+    return pattern
@@ -1,4 +1,5 @@
 from logic import *
+from sat import KnowledgeBase
 
 AKnight = Symbol("A is a Knight")
 AKnave = Symbol("A is a Knave")
@@ -86,8 +87,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
+            knowledge = KnowledgeBase(knowledge)
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if knowledge.entails(symbol):
                     print(f"    {symbol}")
 
 
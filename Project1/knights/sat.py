@@ -0,0 +1,509 @@
+"""
+SAT-based entailment for logic.py
+
+Truth tables double with every symbol, so model_check cannot handle more
+than a few dozen. Here sentences are instead converted to clauses by the
+Tseitin encoding, which gives every compound subsentence a variable of
+its own so the clauses grow linearly with the sentence, and handed to a
+CDCL solver: DPLL with unit propagation on two watched literals, clause
+learning and non-chronological backjumping. A knowledge base entails a
+query exactly when the knowledge base and the query's negation cannot
+both be true.
+
+Variables are positive ints and clauses are lists of literals, where -v
+is the negation of variable v, as in the DIMACS format.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Sentence, Symbol
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query."""
+    encoder = Tseitin()
+    encoder.add(knowledge)
+    literal = encoder.literal(query)
+    solver = Solver()
+    for clause in encoder.clauses:
+        solver.add_clause(clause)
+    return not solver.solve([-literal])
+
+
+class KnowledgeBase():
+    """Sentences known to be true, which answers entailment queries with
+    one solver kept between them."""
+
+    def __init__(self, *sentences):
+        self.encoder = Tseitin()
+        self.solver = Solver()
+        self.sentences = []
+
+        # Number of the encoder's clauses given to the solver so far
+        self.encoded = 0
+
+        # Models of the knowledge base found so far, as symbol values,
+        # and the answer to each query asked since the last addition
+        self.models = []
+        self.cache = {}
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.encoder.add(sentence)
+        self.update()
+
+        # Old models may not satisfy the new sentence, and queries that
+        # were not entailed may be now, but entailed ones still are
+        self.models.clear()
+        self.cache = {query: True for query, entailed in self.cache.items()
+                      if entailed}
+
+    def entails(self, query):
+        """Checks if knowledge base entails query."""
+        Sentence.validate(query)
+        query = query.shared()
+        if query in self.cache:
+            return self.cache[query]
+
+        # A model of the knowledge base where query is false shows that
+        # it is not entailed, with no need to search again
+        symbols = query.names()
+        for model in self.models:
+            if symbols <= model.keys() and not query.evaluate(model):
+                self.cache[query] = False
+                return False
+
+        literal = self.encoder.literal(query)
+        self.update()
+        if self.solver.solve([-literal]):
+            self.models.append({
+                name: self.solver.model[variable]
+                for name, variable in self.encoder.variables.items()
+            })
+            self.cache[query] = False
+        else:
+            self.cache[query] = True
+        return self.cache[query]
+
+    def update(self):
+        """Gives the solver any clauses the encoder has added."""
+        for clause in self.encoder.clauses[self.encoded:]:
+            self.solver.add_clause(clause)
+        self.encoded = len(self.encoder.clauses)
+
+
+def to_cnf(sentence):
+    """Returns clauses that are satisfiable exactly when sentence is, and
+    the variable of each symbol in them."""
+    encoder = Tseitin()
+    encoder.add(sentence)
+    return encoder.clauses, encoder.variables
+
+
+class Tseitin():
+    """Converts sentences to clauses, giving each symbol and each distinct
+    compound subsentence a variable."""
+
+    def __init__(self):
+        self.clauses = []
+        self.size = 0
+
+        # Variable of each symbol name
+        self.variables = {}
+
+        # Literal equivalent to each compound sentence encoded so far
+        self.definitions = {}
+
+        # Variable that is always true, for empty conjunctions
+        self.true = None
+
+    def variable(self, name=None):
+        """Returns the variable of a symbol name, or a new variable."""
+        if name in self.variables:
+            return self.variables[name]
+        self.size += 1
+        if name is not None:
+            self.variables[name] = self.size
+        return self.size
+
+    def add(self, sentence):
+        """Adds clauses requiring sentence to be true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when sentence is,
+        adding the clauses defining it if it is new."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        sentence = sentence.shared()
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        if isinstance(sentence, (And, Or)):
+            parts = (sentence.conjuncts if isinstance(sentence, And)
+                     else sentence.disjuncts)
+            if len(parts) == 1:
+                return self.literal(parts[0])
+            literals = [self.literal(part) for part in parts]
+
+            # An Or is the negation of the And of its negated parts
+            sign = 1 if isinstance(sentence, And) else -1
+            literals = [sign * literal for literal in literals]
+            if not literals:
+                literal = self.constant()
+            else:
+                literal = self.variable()
+                for part in literals:
+                    self.clauses.append([-literal, part])
+                self.clauses.append([literal] + [-part for part in literals])
+            literal *= sign
+
+        elif isinstance(sentence, Implication):
+            antecedent = self.literal(sentence.antecedent)
+            consequent = self.literal(sentence.consequent)
+            literal = self.variable()
+            self.clauses.append([-literal, -antecedent, consequent])
+            self.clauses.append([literal, antecedent])
+            self.clauses.append([literal, -consequent])
+
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            literal = self.variable()
+            self.clauses.append([-literal, -left, right])
+            self.clauses.append([-literal, left, -right])
+            self.clauses.append([literal, left, right])
+            self.clauses.append([literal, -left, -right])
+
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.definitions[sentence] = literal
+        return literal
+
+    def constant(self):
+        """Returns a variable that is always true."""
+        if self.true is None:
+            self.true = self.variable()
+            self.clauses.append([self.true])
+        return self.true
+
+
+class Solver():
+    """CDCL SAT solver.
+
+    Clauses can be added between calls to solve, and clauses learned by
+    earlier calls are kept, as they follow from the clauses added."""
+
+    # Conflicts before the first restart; later restarts follow the
+    # Luby sequence in multiples of this
+    RESTART = 100
+
+    # Factor by which variable activity decays after each conflict
+    DECAY = 0.95
+
+    def __init__(self):
+        self.size = 0
+        self.clauses = []
+        self.learned = []
+
+        # False once the clauses are known to be unsatisfiable
+        self.ok = True
+
+        # Per variable: 1 if true, -1 if false, 0 if unassigned, and the
+        # decision level and clause that made the assignment
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+
+        # Per variable: conflict activity, and the value it last had
+        self.activity = [0.0]
+        self.phases = [-1]
+        self.increment = 1.0
+        self.heap = []
+
+        # Clauses watching each literal, at index 2 * v or 2 * v + 1
+        self.watches = [[], []]
+
+        # Assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.limits = []
+        self.head = 0
+
+        # Satisfying assignment found by the last successful solve
+        self.model = None
+
+    def grow(self, size):
+        """Makes room for variables up to size."""
+        while self.size < size:
+            self.size += 1
+            self.values.append(0)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.phases.append(-1)
+            self.watches.extend([[], []])
+            heapq.heappush(self.heap, (0.0, self.size))
+
+    def value(self, literal):
+        """Returns 1 if literal is true, -1 if false, 0 if unassigned."""
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause):
+        """Adds a clause, returning False if the clauses are now known to
+        be unsatisfiable."""
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        self.grow(max((abs(literal) for literal in clause), default=0))
+
+        # Drop literals false at level 0 and clauses already satisfied
+        literals = []
+        for literal in clause:
+            value = self.value(literal)
+            if value > 0 or -literal in literals:
+                return True
+            if value == 0 and literal not in literals:
+                literals.append(literal)
+
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self.assign(literals[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.watch(literals)
+            self.clauses.append(literals)
+        return self.ok
+
+    def solve(self, assumptions=()):
+        """Returns True if the clauses can all be true with every literal
+        in assumptions true, storing an assignment in model if so."""
+        self.model = None
+        if not self.ok:
+            return False
+        self.grow(max((abs(literal) for literal in assumptions), default=0))
+
+        conflicts = 0
+        restarts = 0
+        limit = self.RESTART * luby(restarts)
+        try:
+            while True:
+                conflict = self.propagate()
+                if conflict is not None:
+                    conflicts += 1
+                    if not self.limits:
+                        self.ok = False
+                        return False
+                    learned, level = self.analyze(conflict)
+                    self.backtrack(level)
+                    if len(learned) == 1:
+                        self.assign(learned[0], None)
+                    else:
+                        self.watch(learned)
+                        self.learned.append(learned)
+                        self.assign(learned[0], learned)
+                    self.increment /= self.DECAY
+                    continue
+
+                if conflicts >= limit:
+                    conflicts = 0
+                    restarts += 1
+                    limit = self.RESTART * luby(restarts)
+                    self.backtrack(0)
+
+                # Assume each assumption in turn, one per decision level
+                literal = None
+                while len(self.limits) < len(assumptions):
+                    assumption = assumptions[len(self.limits)]
+                    value = self.value(assumption)
+                    if value < 0:
+                        return False
+                    self.limits.append(len(self.trail))
+                    if value == 0:
+                        literal = assumption
+                        break
+
+                if literal is None:
+                    literal = self.decide()
+                    if literal is None:
+                        self.model = {
+                            variable: self.values[variable] > 0
+                            for variable in range(1, self.size + 1)
+                        }
+                        return True
+                    self.limits.append(len(self.trail))
+                self.assign(literal, None)
+        finally:
+            self.backtrack(0)
+
+    def watch(self, clause):
+        """Watches the first two literals of clause."""
+        self.watches[index(clause[0])].append(clause)
+        self.watches[index(clause[1])].append(clause)
+
+    def assign(self, literal, reason):
+        """Makes literal true at the current decision level."""
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = len(self.limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """Assigns every literal implied by a clause with all its other
+        literals false, returning a clause with all literals false if
+        one comes up."""
+        values = self.values
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[index(false)]
+            kept = []
+            for position, clause in enumerate(watching):
+                # Keep the false literal second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                value = values[first] if first > 0 else -values[-first]
+                if value > 0:
+                    kept.append(clause)
+                    continue
+
+                # Watch another literal that is not false, if any
+                for i in range(2, len(clause)):
+                    other = clause[i]
+                    if (values[other] if other > 0 else -values[-other]) >= 0:
+                        clause[1], clause[i] = other, false
+                        self.watches[index(other)].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if value < 0:
+                        kept.extend(watching[position + 1:])
+                        self.watches[index(false)] = kept
+                        self.head = len(self.trail)
+                        return clause
+                    self.assign(first, clause)
+            self.watches[index(false)] = kept
+        return None
+
+    def analyze(self, conflict):
+        """Returns a clause learned from a conflict, with its asserting
+        literal first, and the level to backjump to."""
+        level = len(self.limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        position = len(self.trail) - 1
+        clause = conflict
+        literal = None
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen:
+                    continue
+                if self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # Resolve on the latest assignment involved in the conflict,
+            # until one literal from the current level remains
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            seen.discard(abs(literal))
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+        learned[0] = -literal
+
+        # Backjump to where the learned clause asserts its first literal
+        if len(learned) == 1:
+            return learned, 0
+        second = max(range(1, len(learned)),
+                     key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[second] = learned[second], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def backtrack(self, level):
+        """Undoes every assignment above decision level."""
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = 0
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = start
+
+    def bump(self, variable):
+        """Raises the activity of a variable involved in a conflict."""
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-activity, variable)
+                         for variable, activity in enumerate(self.activity)
+                         if variable and not self.values[variable]]
+            heapq.heapify(self.heap)
+        elif not self.values[variable]:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def decide(self):
+        """Returns the next decision: the most active unassigned variable,
+        with the value it last had, or None if all are assigned."""
+        while self.heap:
+            priority, variable = heapq.heappop(self.heap)
+            if self.values[variable] or -priority != self.activity[variable]:
+                continue
+            return variable * self.phases[variable]
+        return None
+
+
+def index(literal):
+    """Returns the position of a literal in lists indexed by literal."""
+    return 2 * literal if literal > 0 else -2 * literal + 1
+
+
+def luby(i):
+    """Returns term i of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ..."""
+    size = 1
+    power = 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        power -= 1
+        i = i % size
+    return 2 ** power